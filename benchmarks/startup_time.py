@@ -0,0 +1,84 @@
+'''
+    Startup time of a pygame_input client, from a fresh interpreter to the first frame on screen
+
+    Every run is a new process with SDL's dummy video driver, so module caches and fonts start cold like
+    on a player's machine or a headless bot. Reports the median time of each phase over the runs, and
+    the whole process time including interpreter startup
+
+    python benchmarks/startup_time.py --runs 10
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process, prints the time at the end of every phase
+CHILD = '''
+import json, os, sys, time
+marks = {}
+start = time.perf_counter()
+sys.path.insert(0, ROOT)
+
+import pygame_input
+marks["import pygame_input"] = time.perf_counter()
+
+import pygame
+from pygame_input import ButtonRect, TextInput, RadioInput, RenderManager
+marks["import pygame"] = time.perf_counter()
+
+pygame.init()
+screen = pygame.display.set_mode((1280, 720))
+marks["display"] = time.perf_counter()
+
+widgets = [TextInput(100, 100 + i * 60, 400, 50, placeholder="input") for i in range(2)]
+widgets += [ButtonRect(600, 100 + i * 40, 80, 30) for i in range(10)]
+for button in widgets[2:]:
+    button.set_label("button")
+widgets.append(RadioInput(600, 500, 200, 100, "radio", ["one", "two"]))
+marks["widgets"] = time.perf_counter()
+
+render = RenderManager(screen, (30, 30, 30))
+render.add(*widgets)
+for widget in widgets:
+    widget.handle_events(pygame.event.get(), 0)
+render.draw()
+marks["first frame"] = time.perf_counter()
+
+print(json.dumps({name: mark - start for name, mark in marks.items()}))
+'''
+
+
+def run_once() -> dict:
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", f"ROOT = {ROOT!r}\n{CHILD}"],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - start
+    marks = json.loads(output.strip().splitlines()[-1])
+    marks["process total"] = total
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the medians as json")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    medians = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    if args.json:
+        print(json.dumps(medians, indent=2))
+        return
+    print(f"median of {args.runs} runs, times since the script started")
+    for name, seconds in medians.items():
+        print(f"{name:>20}: {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+'''
+    Headless benchmark of GlyphAtlas.draw against font.render + blit, runs offline with SDL's dummy video driver
+
+    Draws the strings a HUD redraws every frame (a counter, an ammo label, a static label, the profiler
+    overlay's numbers, chat lines) once per frame both ways and reports the best per string time of
+    every case. The atlas only batches glyph blits on pygame-ce, on pygame it falls back to the font and
+    both columns should be about equal
+
+    python benchmarks/text_bench.py
+    python benchmarks/text_bench.py --font fonts/ARIAL.TTF --size 20 --frames 5000
+'''
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+pygame.init()
+
+from pygame_input import GlyphAtlas
+
+WHITE = (255, 255, 255)
+
+
+def cases(frames: int) -> dict[str, list[str]]:
+    '''The string drawn on every frame of each case'''
+    return {
+        # A new string every frame
+        "counter": [str(1000 + frame) for frame in range(frames)],
+        "timer": [f"Round time {frame / 60:.2f} s" for frame in range(frames)],
+        "chat": [f"player{frame % 50}: gg that was a close round, rematch? {frame}" for frame in range(frames)],
+        # A few strings coming back
+        "ammo": [f"Ammo {frame % 31} / 30" for frame in range(frames)],
+        "overlay": [f"{frame % 500 / 100:.2f}" for frame in range(frames)],
+        "static": ["Score"] * frames,
+    }
+
+
+def best_times(draws: list, texts: list[str], repeat: int) -> list[float]:
+    '''Best time per string of every draw function over `repeat` runs, in seconds
+
+    The runs of the draw functions alternate, so a slower stretch of the machine doesn't skew only one of them
+    '''
+    best = [float("inf")] * len(draws)
+    for _ in range(repeat):
+        for index, draw in enumerate(draws):
+            start = time.perf_counter()
+            for text in texts:
+                draw(text)
+            best[index] = min(best[index], (time.perf_counter() - start) / len(texts))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--font", default=None, help="font file, pygame's default font if not given")
+    parser.add_argument("--size", type=int, default=24, help="font size")
+    parser.add_argument("--frames", type=int, default=3000, help="strings drawn per case and run")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    screen = pygame.display.set_mode((800, 600))
+    font = pygame.font.Font(args.font, args.size)
+    print(f"{pygame.version.ver}, Surface.fblits: {hasattr(screen, 'fblits')}")
+    print(f"{'case':10}{'render+blit':>14}{'atlas.draw':>14}")
+    for name, texts in cases(args.frames).items():
+        # A new atlas per case, so no case starts with the layouts of the previous one
+        atlas = GlyphAtlas(font)
+        rendered, drawn = best_times(
+            [lambda text: screen.blit(font.render(text, True, WHITE), (10, 10)),
+             lambda text: atlas.draw(screen, text, (10, 10), WHITE)],
+            texts, args.repeat)
+        print(f"{name:10}{rendered * 1e6:12.1f}us{drawn * 1e6:12.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+'''
+    Headless benchmark of pygame_input, runs offline with SDL's dummy video driver
+
+    Builds a scene of buttons, text inputs and radio groups, replays scripted event streams (idle frames,
+    hover sweeps, clicks, typing bursts, a held key repeating) and reports the time of every frame
+    (handle_events and draw). A second run, traced with tracemalloc so tracing doesn't skew the timings,
+    counts the Python memory blocks each frame allocates that are still alive when it ends, and their size.
+    tracemalloc only sees the Python heap, the pixel buffers of SDL surfaces are not counted.
+    Results are written in the profiler.py dump format
+
+    python benchmarks/ui_bench.py --buttons 200 --save baseline.json
+    python benchmarks/ui_bench.py --buttons 200 --compare baseline.json --threshold 0.25
+'''
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+pygame.init()
+
+from pygame_input import ButtonRect, TextInput, RadioInput, RenderManager, WidgetManager
+from pygame_input.radio import BASIC_RADIO_SELECTION_BUTTON
+from profiler import compare, percentile
+
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+FRAME_DT = 1 / 60
+
+
+class Scene:
+    '''Widgets laid out on a grid, driven either through the managers or by looping over every widget'''
+
+    def __init__(self, screen: pygame.Surface, buttons: int, text_inputs: int, radios: int, managed: bool) -> None:
+        self.screen = screen
+        self.managed = managed
+        self.buttons = []
+        self.text_inputs = []
+        self.radios = []
+        label_font = pygame.font.Font(None, 20)
+        text_font = pygame.font.Font(None, 28)
+
+        columns = max(1, SCREEN_WIDTH // 70)
+        for index in range(buttons):
+            x, y = 10 + index % columns * 70, 10 + index // columns * 40
+            button = ButtonRect(x, y, 60, 30, 4, outline_width=2, outline_color=(200, 0, 0))
+            button.set_label(f"b{index}", label_font, (0, 0, 0))
+            button.set_hover(_raise_button, _lower_button)
+            self.buttons.append(button)
+
+        top = 20 + (buttons + columns - 1) // columns * 40
+        for index in range(text_inputs):
+            x, y = 10 + index % 3 * 420, top + index // 3 * 60
+            text_input = TextInput(x, y, 400, 50, 10, placeholder=f"input {index}", font=text_font, outline_width=2)
+            text_input.set_mouse_button(1)
+            self.text_inputs.append(text_input)
+
+        top += (text_inputs + 2) // 3 * 60 + 10
+        for index in range(radios):
+            x, y = 10 + index % 8 * 155, top + index // 8 * 80
+            radio = RadioInput(x, y, 150, 75, f"group {index}", ["one", "two", "three"])
+            radio.set_all_buttons(BASIC_RADIO_SELECTION_BUTTON)
+            radio.set_all_text_color((255, 255, 255))
+            for position, option in enumerate(radio.options):
+                option.x, option.y = x, y + position * 24
+                option.button.x, option.button.y = option.x, option.y
+            self.radios.append(radio)
+
+        self.widgets = [*self.text_inputs, *self.buttons, *self.radios]
+        if managed:
+            self.manager = WidgetManager()
+            self.manager.add(*self.widgets)
+            self.render = RenderManager(screen, (30, 30, 30))
+            self.render.add(*self.widgets)
+
+    def frame(self, events: list):
+        if self.managed:
+            self.manager.handle_events(events, FRAME_DT)
+            self.render.draw()
+        else:
+            for widget in self.widgets:
+                widget.handle_events(events, FRAME_DT)
+            self.screen.fill((30, 30, 30))
+            for widget in self.widgets:
+                widget.draw(self.screen)
+            pygame.display.flip()
+
+
+def _raise_button(button: ButtonRect):
+    button.display_dy = -4
+    button.display_dheight = 4
+
+
+def _lower_button(button: ButtonRect):
+    button.display_dy = 0
+    button.display_dheight = 0
+
+
+def _motion(pos: tuple) -> pygame.event.Event:
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+
+def _click(pos: tuple) -> list:
+    return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1),
+            pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1)]
+
+
+def _key(key: int, unicode: str, up: bool = True) -> list:
+    events = [pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0)]
+    if up:
+        events.append(pygame.event.Event(pygame.KEYUP, key=key, unicode=unicode, mod=0))
+    return events
+
+
+def idle(scene: Scene, frames: int) -> list:
+    return [[] for _ in range(frames)]
+
+
+def hover_sweep(scene: Scene, frames: int) -> list:
+    '''The cursor crosses the screen in rows, with several motion events per frame like a fast mouse'''
+    script = []
+    for frame in range(frames):
+        y = frame * 37 % SCREEN_HEIGHT
+        script.append([_motion(((frame * 97 + step * 23) % SCREEN_WIDTH, y)) for step in range(4)])
+    return script
+
+
+def clicks(scene: Scene, frames: int) -> list:
+    targets = [button.rect.center for button in scene.buttons] + [radio.options[0].button.rect.center for radio in scene.radios]
+    if not targets:
+        return idle(scene, frames)
+    return [_click(targets[frame % len(targets)]) if frame % 2 == 0 else [] for frame in range(frames)]
+
+
+def typing(scene: Scene, frames: int) -> list:
+    '''Bursts of typing into the text inputs in turn, with a backspace now and then'''
+    if not scene.text_inputs:
+        return idle(scene, frames)
+    text = "the quick brown fox jumps over the lazy dog "
+    script = []
+    for frame in range(frames):
+        if frame % 120 == 0:
+            script.append(_click(scene.text_inputs[frame // 120 % len(scene.text_inputs)].rect.center))
+        elif frame % 9 == 0:
+            script.append(_key(pygame.K_BACKSPACE, "\b"))
+        else:
+            char = text[frame % len(text)]
+            script.append(_key(pygame.key.key_code(char) if char != " " else pygame.K_SPACE, char))
+    return script
+
+
+def key_repeat(scene: Scene, frames: int) -> list:
+    '''A character key held down in a focused text input, past the repeat delay'''
+    if not scene.text_inputs:
+        return idle(scene, frames)
+    script = [_click(scene.text_inputs[0].rect.center), _key(pygame.K_x, "x", up=False)]
+    script += [[] for _ in range(frames - 3)]
+    script.append([pygame.event.Event(pygame.KEYUP, key=pygame.K_x, unicode="x", mod=0)])
+    return script
+
+
+# Snapshots allocate too, only the blocks allocated outside tracemalloc are counted
+_NOT_TRACEMALLOC = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def _live_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> tuple[int, int]:
+    '''Number and total size of the Python memory blocks allocated between the snapshots and not freed'''
+    before = before.filter_traces(_NOT_TRACEMALLOC)
+    after = after.filter_traces(_NOT_TRACEMALLOC)
+    blocks = size = 0
+    for stat in after.compare_to(before, "traceback"):
+        if stat.count_diff > 0:
+            blocks += stat.count_diff
+            size += max(stat.size_diff, 0)
+    return blocks, size
+
+
+SCENARIOS = {"idle": idle, "hover_sweep": hover_sweep, "clicks": clicks, "typing": typing, "key_repeat": key_repeat}
+
+
+def run_scenario(args, scenario) -> dict:
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    def play(traced: bool) -> list:
+        scene = Scene(screen, args.buttons, args.text_inputs, args.radios, not args.direct)
+        script = scenario(scene, args.frames)
+        for events in script[:args.warmup]:
+            scene.frame(events)
+        samples = []
+        # Snapshots of the whole heap are slow, only the first frames after the warmup are traced
+        timed = script[args.warmup:args.warmup + args.traced_frames] if traced else script[args.warmup:]
+        for events in timed:
+            if traced:
+                before = tracemalloc.take_snapshot()
+                scene.frame(events)
+                samples.append(_live_allocations(before, tracemalloc.take_snapshot()))
+            else:
+                start = time.perf_counter()
+                scene.frame(events)
+                samples.append(time.perf_counter() - start)
+        return samples
+
+    # The fastest of the repeats is the one least disturbed by the rest of the machine
+    times = min((play(False) for _ in range(args.repeat)), key=statistics.fmean)
+    tracemalloc.start()
+    allocations = play(True)
+    tracemalloc.stop()
+    return {"count": len(times),
+            "p50": percentile(times, 50),
+            "p99": percentile(times, 99),
+            "max": max(times),
+            "mean": statistics.fmean(times),
+            "live_blocks": statistics.fmean(blocks for blocks, _ in allocations),
+            "live_bytes": statistics.fmean(size for _, size in allocations)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buttons", type=int, default=200)
+    parser.add_argument("--text-inputs", type=int, default=6)
+    parser.add_argument("--radios", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=600, help="frames per scenario, including warmup")
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--traced-frames", type=int, default=60, help="frames traced for the live allocation counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario, the fastest is reported")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="run only these, can be repeated")
+    parser.add_argument("--direct", action="store_true",
+                        help="call every widget every frame and flip the display, instead of WidgetManager and RenderManager")
+    parser.add_argument("--save", help="write the results to a json file")
+    parser.add_argument("--compare", help="json file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+    if args.frames <= args.warmup:
+        parser.error("--frames must be larger than --warmup")
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = run_scenario(args, SCENARIOS[name])
+    report = {"time": time.time(), "scene": {"buttons": args.buttons, "text_inputs": args.text_inputs,
+                                             "radios": args.radios, "direct": args.direct},
+              "sections": results}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print(f"{'scenario':<14}{'p50 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'live blocks':>13}{'live KiB':>10}", end="")
+    print(f"{'base p50':>10}{'base p99':>10}" if baseline else "")
+    regressions = compare(baseline, report, args.threshold) if baseline else []
+    for name, result in results.items():
+        line = (f"{name:<14}{result['p50'] * 1000:>9.3f}{result['p99'] * 1000:>9.3f}"
+                f"{result['mean'] * 1000:>9.3f}{result['live_blocks']:>13.1f}{result['live_bytes'] / 1024:>10.1f}")
+        base = baseline["sections"].get(name) if baseline else None
+        if base:
+            line += f"{base['p50'] * 1000:>10.3f}{base['p99'] * 1000:>10.3f}"
+            line += "  slower" if name in regressions else ""
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
-import json
 import os
-import asyncio
+import time
 
 import pygame
 import pygame_gui
 from pygame_gui.core import ObjectID
 pygame.init()
 
+from gameloop import GameLoop
 from network import Network
+from profiler import profiler
 
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-clock = pygame.time.Clock()
+SERVER_TICK_RATE = 30
 
 network = Network("ws://localhost:8765")
 network.start_connection()
@@ -61,7 +62,11 @@ submit_button = pygame_gui.elements.UIButton(relative_rect=pygame.Rect(180, 50,
                                              anchors=ANCHOR_CENTER)
 
 
-async def on_signin():
+LOGIN_TIMEOUT = 5
+login_sent_at = None
+
+def on_signin():
+    global login_sent_at
     print(1)
     if not username_input.text:
         error_display.visible = 1
@@ -80,21 +85,14 @@ async def on_signin():
     
     password_input.clear()
     
-    try:
-        await network.send(json.dumps(signin_info))
-    except:
-        return
-    
-    try:
-        result = await network.recv()
-    except asyncio.TimeoutError as e:
-        error_display.set_text("Connection Timeout")
-        return
-    except:
-        return
-    
+    network.post(signin_info)
+    login_sent_at = time.perf_counter()
+
+
+def on_login_result(result):
+    global login_sent_at
+    login_sent_at = None
     print(f"{result=}")
-    result = json.loads(result)
 
     if result["failed"]:
         error_display.visible = 1
@@ -105,6 +103,9 @@ async def on_signin():
     submit_button.disable()
 
 
+network.on("login_result", on_login_result)
+
+
 def on_connection_error():
     error_display.visible = 1
     error_display.set_text("Not connected to server")
@@ -112,52 +113,68 @@ network.set_on_connection_error(on_connection_error)
     
     
 
-async def main():
-    run = True
-    dt = 0
-    while run:
-        events = pygame.event.get()
-        for event in events:
-            if event.type == pygame.QUIT:
-                await network.websocket.close()
-                run = False
-                break
-
-            elif event.type == pygame_gui.UI_TEXT_ENTRY_FINISHED:
-                if event.ui_object_id == "#username_input":
-                    username_input.unfocus()
-                    password_input.focus()
-                elif event.ui_object_id == "#password_input":
-                    password_input.unfocus()
-                    await on_signin()
+def update(dt):
+    # Fixed simulation tick, in step with the server
+    global login_sent_at
+    network.dispatch()
+    if login_sent_at and time.perf_counter() - login_sent_at > LOGIN_TIMEOUT:
+        login_sent_at = None
+        error_display.visible = 1
+        error_display.set_text("Connection Timeout")
+
+
+def draw_frame(alpha, frame_time):
+    events = pygame.event.get()
+    for event in events:
+        if event.type == pygame.QUIT:
+            network.close()
+            loop.stop()
+            return
+
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.toggle()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            profiler.dump(f"profile-{int(time.time())}.json")
+
+        elif event.type == pygame_gui.UI_TEXT_ENTRY_FINISHED:
+            if event.ui_object_id == "#username_input":
+                username_input.unfocus()
+                password_input.focus()
+            elif event.ui_object_id == "#password_input":
+                password_input.unfocus()
+                on_signin()
+        
+        elif event.type == pygame_gui.UI_BUTTON_PRESSED:
+            if event.ui_object_id == "#signin_options":
+                if signin_options.text == "login":
+                    signin_options.set_text("signup")
+                else:
+                    signin_options.set_text("login")
+            elif event.ui_object_id == "#submit_button":
+                on_signin()
             
-            elif event.type == pygame_gui.UI_BUTTON_PRESSED:
-                if event.ui_object_id == "#signin_options":
-                    if signin_options.text == "login":
-                        signin_options.set_text("signup")
-                    else:
-                        signin_options.set_text("login")
-                elif event.ui_object_id == "#submit_button":
-                    await on_signin()
-                
 
+        with profiler.section("ui.process_events"):
             manager.process_events(event)
-        
-                    
-        manager.update(dt)
 
-        manager.draw_ui(screen)
-        pygame.display.flip()
+    # UI animations follow real time, not simulation ticks
+    with profiler.section("ui.update"):
+        manager.update(frame_time)
 
-        
-        dt = clock.tick(60)/1000
-    
+    with profiler.section("ui.draw"):
+        manager.draw_ui(screen)
+    if profiler.enabled:
+        profiler.draw_overlay(screen)
+    pygame.display.flip()
 
 
+loop = GameLoop(update, draw_frame, tick_rate=SERVER_TICK_RATE, max_fps=60)
 
 
+def main():
+    loop.run()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
     pygame.quit()
\ No newline at end of file
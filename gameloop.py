@@ -0,0 +1,93 @@
+'''
+    Fixed timestep game loop, the simulation ticks at a fixed rate while frames render as fast as allowed
+'''
+import time
+from typing import Callable
+
+from profiler import profiler
+
+
+class GameLoop:
+    '''
+        Runs `update` at a fixed tick rate and `render` once per frame
+
+        Usage
+        ------------
+        `update(dt)` is always called with the same `dt`, as many times as needed to catch up with real
+        time, so the simulation, prediction and replays don't depend on the frame rate. Set the tick rate
+        to the server's. `render(alpha, frame_time)` is called once per frame, `alpha` is how far real time
+        is between the last tick and the next one, from 0 to 1, for interpolating what is drawn.
+        With `max_fps=None` frames are not capped, for vsync create the display with `vsync=1` and leave
+        the frames uncapped, flipping the display then waits for the screen
+
+        Parameters
+        ----------
+        update
+            Function to be called every tick, take in 1 argument: the tick length in seconds
+        render
+            Function to be called every frame, take in 2 arguments: alpha, seconds since the last frame
+        tick_rate: `int`
+            Simulation ticks per second
+        max_fps: `int` | `None`
+            Frame rate cap, None for uncapped
+        max_frame_time: `float`
+            Longest frame time caught up on, after a longer stall the simulation slows down
+            instead of running many ticks in a row
+    '''
+
+    def __init__(self,
+                 update: Callable[[float], None],
+                 render: Callable[[float, float], None],
+                 tick_rate: int = 30,
+                 max_fps: int | None = 60,
+                 max_frame_time: float = 0.25) -> None:
+        self.update = update
+        self.render = render
+        self.tick_rate = tick_rate
+        self.max_fps = max_fps
+        self.max_frame_time = max_frame_time
+        self.tick = 0
+        self.alpha = 0.0
+        self.running = False
+        self._accumulator = 0.0
+        self._last_time: float | None = None
+
+    @property
+    def tick_time(self) -> float:
+        return 1 / self.tick_rate
+
+    def step(self):
+        '''Run the ticks that are due and render one frame'''
+        now = time.perf_counter()
+        frame_time = 0.0 if self._last_time is None else min(now - self._last_time, self.max_frame_time)
+        self._last_time = now
+
+        tick_time = self.tick_time
+        self._accumulator += frame_time
+        while self._accumulator >= tick_time:
+            with profiler.section("sim.update"):
+                self.update(tick_time)
+            self.tick += 1
+            self._accumulator -= tick_time
+        self.alpha = self._accumulator / tick_time
+
+        with profiler.section("render"):
+            self.render(self.alpha, frame_time)
+        profiler.frame()
+
+        if self.max_fps:
+            # Sleep until the next frame is due, measured from the start of this one
+            remaining = now + 1 / self.max_fps - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def run(self):
+        '''Step until `stop` is called'''
+        self.running = True
+        self._last_time = None
+        while self.running:
+            self.step()
+
+    def stop(self):
+        '''Stop `run` after the current frame'''
+        self.running = False
@@ -0,0 +1,104 @@
+import math
+import time
+from collections import deque
+
+
+class InterpolationBuffer:
+    '''
+        Time indexed ring buffer of snapshots, renders remote entities a fixed delay behind the newest one
+
+        Usage
+        ------------
+        `push` every received snapshot, `sample` once every frame. Timestamps passed to `push` and `sample`
+        must come from the same clock, both default to time.perf_counter
+
+        Parameters
+        ----------
+        delay: `float`
+            Seconds behind the newest snapshot that entities are rendered at
+        capacity: `int`
+            Number of snapshots kept
+        max_extrapolation: `float`
+            Seconds entities keep moving past the newest snapshot when snapshots stop arriving
+        fields: `tuple`
+            Entity fields interpolated linearly
+        angle_fields: `tuple`
+            Entity fields in radians, interpolated along the shortest arc
+    '''
+
+    def __init__(self,
+                 delay: float = 0.1,
+                 capacity: int = 32,
+                 max_extrapolation: float = 0.25,
+                 fields: tuple = ("x", "y"),
+                 angle_fields: tuple = ("angle",)) -> None:
+        self.delay = delay
+        self.max_extrapolation = max_extrapolation
+        self.fields = fields
+        self.angle_fields = angle_fields
+        self._snapshots: deque[tuple[float, dict[int, dict]]] = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def push(self, entities: dict[int, dict], timestamp: float | None = None):
+        '''Add a snapshot, snapshots older than the newest one are ignored
+
+        Parameters
+        ----------
+        entities: `dict`
+            Entity id to entity state
+        timestamp: `float`
+            Time of the snapshot, defaults to now
+        '''
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self._snapshots and timestamp <= self._snapshots[-1][0]:
+            return
+        self._snapshots.append((timestamp, entities))
+
+    def sample(self, now: float | None = None) -> dict[int, dict]:
+        '''Entity states at `now` minus the delay, interpolated between the two snapshots around it'''
+        if not self._snapshots:
+            return {}
+        if now is None:
+            now = time.perf_counter()
+        render_time = now - self.delay
+        snapshots = self._snapshots
+
+        if render_time >= snapshots[-1][0]:
+            if len(snapshots) == 1:
+                return snapshots[-1][1]
+            # Bounded extrapolation along the last known velocity
+            (t0, older), (t1, newer) = snapshots[-2], snapshots[-1]
+            render_time = min(render_time, t1 + self.max_extrapolation)
+            return self._blend(older, newer, (render_time - t0) / (t1 - t0))
+        if render_time <= snapshots[0][0]:
+            return snapshots[0][1]
+
+        for index in range(len(snapshots) - 1, 0, -1):
+            t0 = snapshots[index - 1][0]
+            if t0 <= render_time:
+                t1 = snapshots[index][0]
+                return self._blend(snapshots[index - 1][1], snapshots[index][1], (render_time - t0) / (t1 - t0))
+        return snapshots[0][1]
+
+    def _blend(self, older: dict[int, dict], newer: dict[int, dict], alpha: float) -> dict[int, dict]:
+        blended = {}
+        for entity_id, end in newer.items():
+            start = older.get(entity_id)
+            if start is None:
+                blended[entity_id] = end
+                continue
+            entity = dict(end)
+            for field in self.fields:
+                entity[field] = start[field] + (end[field] - start[field]) * alpha
+            for field in self.angle_fields:
+                difference = (end[field] - start[field] + math.pi) % math.tau - math.pi
+                # Wrapped back into [-pi, pi], the arc can cross it
+                entity[field] = (start[field] + difference * alpha + math.pi) % math.tau - math.pi
+            blended[entity_id] = entity
+        return blended
@@ -0,0 +1,240 @@
+'''
+    Headless load test, runs many simulated clients built on Network on one event loop
+
+    Every bot signs up, logs in on a fresh connection, streams synthetic input at a fixed rate while
+    applying snapshots, and optionally drops its connection once to go through the reconnect flow.
+    Without --uri a LocalServer is started in the same process so it runs offline, with the given
+    network conditions injected
+
+    python loadtest.py --clients 200 --duration 20 --latency 0.03 --jitter 0.01 --drop 0.01
+'''
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from network import Network, CONNECTION_ERROR, LOGIN_RESULT
+from prediction import Predictor
+from snapshot import SnapshotReceiver
+from local_server import LocalServer, LinkConditions
+from profiler import percentile
+
+
+def summarize(values: list) -> dict:
+    return {"count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values) if values else None}
+
+
+class Bot:
+    def __init__(self, uri: str, index: int, input_rate: int = 30, reconnect: bool = False, timeout: float = 10) -> None:
+        self.uri = uri
+        self.username = f"bot{index}-{random.randrange(1 << 30)}"
+        self.password = "password"
+        self.input_rate = input_rate
+        self.reconnect = reconnect
+        self.timeout = timeout
+
+        self.network: Network | None = None
+        self.login_latencies = []
+        self.rtts = []
+        self.reconnect_latencies = []
+        self.inputs = 0
+        self.snapshots = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.messages_dropped = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error = None
+
+    async def _request(self, network: Network, message: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+
+        def on_result(result):
+            if not future.done():
+                future.set_result(result)
+        network.on(LOGIN_RESULT, on_result)
+        started = time.perf_counter()
+        network.post(message)
+        try:
+            while not future.done():
+                network.dispatch()
+                if time.perf_counter() - started > self.timeout:
+                    raise TimeoutError(f"no reply to {message['mode']}")
+                await asyncio.sleep(0.005)
+        finally:
+            network.off(LOGIN_RESULT, on_result)
+        self.login_latencies.append(time.perf_counter() - started)
+        if future.result()["failed"]:
+            raise RuntimeError(f"{message['mode']} failed: {future.result()['error_message']}")
+        return future.result()
+
+    async def _open(self) -> Network:
+        network = Network(self.uri)
+        network.ping_interval = 0.5
+        network.set_reconnect_policy(0.1, 2, deadline=self.timeout)
+        network.start_connection(asyncio.get_running_loop())
+        return network
+
+    async def _close(self, network: Network):
+        await network.aclose()
+        self.messages_sent += network.messages_sent
+        self.messages_received += network.messages_received
+        self.messages_dropped += network.messages_dropped
+        self.bytes_sent += network.bytes_sent
+        self.bytes_received += network.bytes_received
+
+    async def run(self, duration: float):
+        try:
+            self.network = network = await self._open()
+            await self._request(network, {"mode": "signup", "username": self.username, "password": self.password})
+            self.network = None
+            await self._close(network)
+
+            self.network = network = await self._open()
+            await self._request(network, {"mode": "login", "username": self.username, "password": self.password})
+            await self._play(network, duration)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if self.network:
+                await self._close(self.network)
+
+    async def _play(self, network: Network, duration: float):
+        predictor = Predictor(network)
+        snapshots = SnapshotReceiver(network)
+
+        def on_snapshot(_):
+            self.snapshots += 1
+        snapshots.set_on_snapshot(on_snapshot)
+        dropped_at = None
+        drop_time = random.uniform(0.2, 0.8) * duration if self.reconnect else None
+
+        def on_connection_error(message):
+            nonlocal dropped_at
+            # Dispatched after the fact, the message carries when the connection was lost
+            dropped_at = message["time"]
+
+        def on_reconnect(_):
+            self.reconnect_latencies.append(time.perf_counter() - dropped_at)
+        # Also covers disconnects injected by the server
+        network.on(CONNECTION_ERROR, on_connection_error)
+        network.set_on_reconnect(on_reconnect)
+
+        started = time.perf_counter()
+        samples = network.latency.sample_count
+        dt = 1 / self.input_rate
+        while time.perf_counter() - started < duration:
+            network.dispatch()
+            if network.latency.sample_count != samples:
+                samples = network.latency.sample_count
+                self.rtts.append(network.latency.last_rtt)
+
+            if drop_time is not None and time.perf_counter() - started >= drop_time and network.websocket:
+                drop_time = None
+                await network.websocket.close()
+
+            predictor.apply(random.choice((-1, 0, 1)), random.choice((-1, 0, 1)), random.uniform(-3.14, 3.14), 0, dt)
+            predictor.flush()
+            self.inputs += 1
+            await asyncio.sleep(dt)
+
+
+async def run_load_test(uri: str | None,
+                        clients: int,
+                        duration: float,
+                        input_rate: int,
+                        reconnect_fraction: float,
+                        ramp: float,
+                        conditions: LinkConditions | None = None) -> dict:
+    server = None
+    if uri is None:
+        server = LocalServer(port=0, conditions=conditions)
+        await server.start()
+        uri = server.uri
+
+    bots = [Bot(uri, index, input_rate, random.random() < reconnect_fraction) for index in range(clients)]
+
+    async def start(bot: Bot, delay: float):
+        await asyncio.sleep(delay)
+        await bot.run(duration)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(start(bot, ramp * index / clients) for index, bot in enumerate(bots)))
+    elapsed = time.perf_counter() - started
+    if server:
+        await server.stop()
+
+    rtts = [rtt for bot in bots for rtt in bot.rtts]
+    return {
+        "uri": uri,
+        "clients": clients,
+        "failed_clients": sum(1 for bot in bots if bot.error),
+        "errors": sorted({bot.error for bot in bots if bot.error}),
+        "elapsed": elapsed,
+        "login_latency": summarize([latency for bot in bots for latency in bot.login_latencies]),
+        "rtt": summarize(rtts),
+        "client_rtt_p99": summarize([percentile(bot.rtts, 99) for bot in bots if bot.rtts]),
+        "reconnect_latency": summarize([latency for bot in bots for latency in bot.reconnect_latencies]),
+        "server_disconnects": server.disconnects if server else None,
+        "inputs_per_second": sum(bot.inputs for bot in bots) / elapsed,
+        "snapshots_per_second": sum(bot.snapshots for bot in bots) / elapsed,
+        "messages_sent_per_second": sum(bot.messages_sent for bot in bots) / elapsed,
+        "messages_received_per_second": sum(bot.messages_received for bot in bots) / elapsed,
+        "bytes_sent_per_second": sum(bot.bytes_sent for bot in bots) / elapsed,
+        "bytes_received_per_second": sum(bot.bytes_received for bot in bots) / elapsed,
+        "messages_dropped": sum(bot.messages_dropped for bot in bots),
+        "per_client": [{"username": bot.username, "error": bot.error, "rtt": summarize(bot.rtts),
+                        "login_latency": summarize(bot.login_latencies)} for bot in bots],
+    }
+
+
+def print_report(report: dict):
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.1f}ms"
+
+    print(f"{report['clients']} clients against {report['uri']} for {report['elapsed']:.1f}s, "
+          f"{report['failed_clients']} failed, {report['server_disconnects'] or 0} injected disconnects")
+    for error in report["errors"]:
+        print(f"  {error}")
+    for name in ("login_latency", "rtt", "client_rtt_p99", "reconnect_latency"):
+        stats = report[name]
+        print(f"{name:>18}: n={stats['count']} p50={ms(stats['p50'])} p95={ms(stats['p95'])} "
+              f"p99={ms(stats['p99'])} max={ms(stats['max'])}")
+    print(f"{'throughput':>18}: {report['inputs_per_second']:.0f} inputs/s, {report['snapshots_per_second']:.0f} snapshots/s, "
+          f"{report['messages_sent_per_second']:.0f} msg/s sent ({report['bytes_sent_per_second'] / 1024:.1f} KiB/s), "
+          f"{report['messages_received_per_second']:.0f} msg/s received ({report['bytes_received_per_second'] / 1024:.1f} KiB/s), "
+          f"{report['messages_dropped']} undecodable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="server to test, starts a local stand-in server when omitted")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10, help="seconds every client streams input")
+    parser.add_argument("--input-rate", type=int, default=30, help="input commands per second per client")
+    parser.add_argument("--reconnect-fraction", type=float, default=0.1, help="fraction of clients that drop and resume once")
+    parser.add_argument("--ramp", type=float, default=2, help="seconds over which clients are started")
+    parser.add_argument("--json", help="write the full report, including per client numbers, to this file")
+    conditions = parser.add_argument_group("local server network conditions")
+    conditions.add_argument("--latency", type=float, default=0, help="one way delay in seconds")
+    conditions.add_argument("--jitter", type=float, default=0, help="random extra delay in seconds")
+    conditions.add_argument("--bandwidth", type=float, help="bytes per second per direction of each connection")
+    conditions.add_argument("--drop", type=float, default=0, help="chance a game message is lost")
+    conditions.add_argument("--disconnect-rate", type=float, default=0, help="chance per second a connection is closed")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.uri, args.clients, args.duration, args.input_rate, args.reconnect_fraction, args.ramp,
+                                       LinkConditions(args.latency, args.jitter, args.bandwidth, args.drop, args.disconnect_rate)))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
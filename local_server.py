@@ -0,0 +1,320 @@
+'''
+    Local stand-in for the game server implementing the flows in communication.txt
+
+    Besides login/signup/reconnect it answers pings, applies input commands, sends player states and
+    full/delta snapshots at the tick rate, and can inject latency, jitter, bandwidth caps, message
+    drops and disconnects for repeatable network tests
+
+    python local_server.py --port 8765 --latency 0.05 --jitter 0.01 --drop 0.02
+'''
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import websockets
+
+from network import (Protocol, default_protocol, message_type, INPUT, PING, PONG, PLAYER_STATE,
+                     SNAPSHOT, SNAPSHOT_DELTA, SNAPSHOT_ACK, SNAPSHOT_REQUEST)
+from prediction import move_player
+
+ENTITY_STATE_FIELDS = ("x", "y", "angle", "health")
+
+
+class LinkConditions:
+    '''
+        Network conditions applied to each direction of every connection
+
+        Parameters
+        ----------
+        latency: `float`
+            One way delay in seconds
+        jitter: `float`
+            Random extra delay between 0 and jitter seconds, message order is kept
+        bandwidth: `float`
+            Bytes per second per direction, None for unlimited
+        drop_rate: `float`
+            Chance a game message is lost, login and reconnect replies are never dropped
+        disconnect_rate: `float`
+            Chance per second a connection is closed by the server
+    '''
+
+    def __init__(self,
+                 latency: float = 0,
+                 jitter: float = 0,
+                 bandwidth: float | None = None,
+                 drop_rate: float = 0,
+                 disconnect_rate: float = 0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.drop_rate = drop_rate
+        self.disconnect_rate = disconnect_rate
+
+    @property
+    def ideal(self) -> bool:
+        return not (self.latency or self.jitter or self.bandwidth or self.drop_rate)
+
+
+class Link:
+    '''One direction of a connection, delivers items in order after the simulated delay'''
+
+    def __init__(self, conditions: LinkConditions, deliver) -> None:
+        self.conditions = conditions
+        self.deliver = deliver
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._last_delivery = 0.0
+        self._link_free = 0.0
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, item, size: int, droppable: bool = True):
+        conditions = self.conditions
+        if droppable and conditions.drop_rate and random.random() < conditions.drop_rate:
+            self.dropped += 1
+            return
+        now = time.perf_counter()
+        if conditions.bandwidth:
+            self._link_free = max(self._link_free, now) + size / conditions.bandwidth
+            now = self._link_free
+        delivery = now + conditions.latency + random.uniform(0, conditions.jitter)
+        # A stream never reorders, a message can't overtake the one before it
+        self._last_delivery = max(self._last_delivery, delivery)
+        self._queue.put_nowait((self._last_delivery, item))
+
+    async def _run(self):
+        while True:
+            delivery, item = await self._queue.get()
+            delay = delivery - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.deliver(item)
+            except websockets.ConnectionClosed:
+                pass
+
+    def close(self):
+        self._task.cancel()
+
+
+class Session:
+    def __init__(self, session_id: str, entity_id: int, username: str) -> None:
+        self.id = session_id
+        self.entity_id = entity_id
+        self.username = username
+        self.state = {"x": 0.0, "y": 0.0, "angle": 0.0, "health": 100}
+        self.last_seq = 0
+        self.websocket = None
+        self.outbound: Link | None = None
+        self.acked_tick: int | None = None
+        self.sent_snapshots: dict[int, dict[int, dict]] = {}
+
+
+class LocalServer:
+    '''
+        Stand-in for the game server implementing the flows in communication.txt
+
+        Usage
+        ------------
+        `async with LocalServer(port=8765) as server:` runs it on the current event loop,
+        clients connect to `server.uri`
+
+        Parameters
+        ----------
+        host: `str`
+            Interface to listen on
+        port: `int`
+            Port to listen on, 0 picks a free one
+        tick_rate: `int`
+            Player states and snapshots sent per second
+        conditions: `LinkConditions`
+            Injected network conditions, none by default
+        snapshot_history: `int`
+            Snapshots kept per client as delta baselines
+    '''
+
+    def __init__(self,
+                 host: str = "localhost",
+                 port: int = 8765,
+                 tick_rate: int = 30,
+                 conditions: LinkConditions | None = None,
+                 snapshot_history: int = 32,
+                 protocol: Protocol | None = None) -> None:
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.conditions = conditions if conditions else LinkConditions()
+        self.snapshot_history = snapshot_history
+        self.protocol = protocol if protocol else default_protocol()
+        self.users: dict[str, str] = {}
+        self.sessions: dict[str, Session] = {}
+        self.tick = 0
+        self.disconnects = 0
+        self._next_entity_id = 1
+        self._server = None
+        self._tick_task = None
+
+    @property
+    def uri(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tick_task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        self._tick_task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        async with self:
+            await asyncio.Future()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.stop()
+
+    def _login(self, request: dict) -> tuple[dict, Session | None]:
+        mode = request.get("mode")
+        if mode == "reconnect":
+            session = self.sessions.get(request.get("prev_id"))
+            if not session:
+                return {"failed": True, "id": "", "error_message": "Session expired"}, None
+            return {"failed": False, "id": session.id}, session
+
+        username, password = request.get("username"), request.get("password")
+        if not username or not password:
+            return {"failed": True, "id": "", "error_message": "username and password are required"}, None
+        if mode == "signup":
+            if username in self.users:
+                return {"failed": True, "id": "", "error_message": "Username already taken"}, None
+            self.users[username] = password
+        elif mode == "login":
+            if self.users.get(username) != password:
+                return {"failed": True, "id": "", "error_message": "Wrong username or password"}, None
+        else:
+            return {"failed": True, "id": "", "error_message": f"Unknown mode {mode}"}, None
+        session = Session(str(uuid.uuid4()), self._next_entity_id, username)
+        self._next_entity_id = self._next_entity_id % 0xFFFF + 1
+        self.sessions[session.id] = session
+        return {"failed": False, "id": session.id}, session
+
+    async def _handle(self, websocket):
+        session = None
+        outbound = Link(self.conditions, websocket.send)
+        inbound = Link(self.conditions, lambda message: self._on_message(session, outbound, message))
+        try:
+            # Login, signup or reconnect until one succeeds, like the login screen does
+            while not session:
+                try:
+                    request = json.loads(await websocket.recv())
+                except ValueError:
+                    continue
+                reply, session = self._login(request)
+                outbound.submit(self.protocol.encode(reply), 0, droppable=False)
+
+            if session.websocket:
+                # A reconnect replaces the old connection of the session
+                session.outbound.close()
+            session.websocket, session.outbound = websocket, outbound
+            session.acked_tick = None
+            async for frame in websocket:
+                message = self.protocol.decode(frame)
+                if message:
+                    inbound.submit(message, len(frame))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            inbound.close()
+            if session and session.websocket is websocket:
+                session.websocket = None
+                session.outbound = None
+            outbound.close()
+
+    async def _on_message(self, session: Session, outbound: Link, message: dict):
+        msg_type = message_type(message)
+        if msg_type == PING:
+            now = time.perf_counter()
+            self._send(outbound, {"type": PONG, "t0": message["t0"], "t1": now, "t2": now})
+        elif msg_type == INPUT:
+            for command in message["commands"]:
+                if command["seq"] > session.last_seq:
+                    session.state = {**move_player(session.state, command), "health": session.state["health"]}
+                    session.last_seq = command["seq"]
+        elif msg_type == SNAPSHOT_ACK:
+            if message["tick"] in session.sent_snapshots:
+                session.acked_tick = message["tick"]
+        elif msg_type == SNAPSHOT_REQUEST:
+            session.acked_tick = None
+
+    def _send(self, link: Link, message: dict):
+        frame = self.protocol.encode(message)
+        link.submit(frame, len(frame))
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(1 / self.tick_rate)
+            self.tick += 1
+            server_time = time.perf_counter()
+            online = [session for session in self.sessions.values() if session.websocket]
+            entities = {session.entity_id: {"id": session.entity_id, **session.state} for session in online}
+            for session in online:
+                if self.conditions.disconnect_rate and random.random() < self.conditions.disconnect_rate / self.tick_rate:
+                    self.disconnects += 1
+                    asyncio.create_task(session.websocket.close(1011, "injected disconnect"))
+                    continue
+                self._send(session.outbound, {"type": PLAYER_STATE, "seq": session.last_seq, **session.state})
+                self._send(session.outbound, self._snapshot(session, server_time, entities))
+
+    def _snapshot(self, session: Session, server_time: float, entities: dict[int, dict]) -> dict:
+        session.sent_snapshots[self.tick] = entities
+        for tick in [tick for tick in session.sent_snapshots if tick <= self.tick - self.snapshot_history]:
+            del session.sent_snapshots[tick]
+
+        baseline = session.sent_snapshots.get(session.acked_tick)
+        if baseline is None:
+            return {"type": SNAPSHOT, "tick": self.tick, "server_time": server_time, "entities": list(entities.values())}
+        changed = []
+        for entity_id, entity in entities.items():
+            previous = baseline.get(entity_id)
+            if previous is None:
+                changed.append(entity)
+                continue
+            fields = {name: entity[name] for name in ENTITY_STATE_FIELDS if entity[name] != previous[name]}
+            if fields:
+                changed.append({"id": entity_id, **fields})
+        removed = [entity_id for entity_id in baseline if entity_id not in entities]
+        return {"type": SNAPSHOT_DELTA, "tick": self.tick, "baseline": session.acked_tick,
+                "server_time": server_time, "entities": changed, "removed": removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tick-rate", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0, help="one way delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="random extra delay in seconds")
+    parser.add_argument("--bandwidth", type=float, help="bytes per second per direction of each connection")
+    parser.add_argument("--drop", type=float, default=0, help="chance a game message is lost")
+    parser.add_argument("--disconnect-rate", type=float, default=0, help="chance per second a connection is closed")
+    args = parser.parse_args()
+
+    conditions = LinkConditions(args.latency, args.jitter, args.bandwidth, args.drop, args.disconnect_rate)
+    server = LocalServer(args.host, args.port, args.tick_rate, conditions)
+    print(f"serving on {server.uri}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,268 @@ import websockets
 from typing import Literal, Callable, Optional
 import asyncio
 import json
+import random
+import struct
+import time
+from collections import deque
 from threading import Thread
 
+from profiler import profiler
+
+LOGIN_RESULT = "login_result"
+# Queued by the network thread itself when the connection is lost or given up on, with the time it happened, never sent
+CONNECTION_ERROR = "connection_error"
+
+
+def message_type(message:dict) -> str|None:
+    '''Type of a decoded message, the login and reconnect replies in communication.txt carry no type'''
+    if "type" in message:
+        return message["type"]
+    if "failed" in message:
+        return LOGIN_RESULT
+    return None
+
+
+class JsonCodec:
+    '''Text frames, used for every message type without a binary codec'''
+    def encode(self, message:dict) -> str:
+        return json.dumps(message, separators=(",", ":"))
+
+    def decode(self, frame:str) -> dict:
+        return json.loads(frame)
+
+
+class StructCodec:
+    '''Fixed layout binary message: header fields, then optionally a record count and repeated records
+
+    Fields are (name, struct format character) pairs, all values are little endian
+
+    Parameters
+    ----------
+    fields: `list`
+        Header fields, e.g. [("tick", "I")]
+    record_fields: `list`
+        Fields of each record in `message[records_key]`, e.g. [("id", "H"), ("x", "f")]
+    records_key: `str`
+        Key of the record list in the message dict
+    '''
+    def __init__(self, fields:list[tuple[str, str]] = (), record_fields:list[tuple[str, str]] = (), records_key:str = "records") -> None:
+        self.fields = tuple(name for name, _ in fields)
+        self.record_fields = tuple(name for name, _ in record_fields)
+        self.records_key = records_key
+        count_format = "H" if record_fields else ""
+        self.header = struct.Struct("<" + "".join(fmt for _, fmt in fields) + count_format)
+        self.record = struct.Struct("<" + "".join(fmt for _, fmt in record_fields)) if record_fields else None
+
+    def encode(self, message:dict) -> bytes:
+        values = [message[name] for name in self.fields]
+        if not self.record:
+            return self.header.pack(*values)
+        records = message[self.records_key]
+        frame = bytearray(self.header.size + self.record.size * len(records))
+        self.header.pack_into(frame, 0, *values, len(records))
+        pack_into, size, names = self.record.pack_into, self.record.size, self.record_fields
+        offset = self.header.size
+        for record in records:
+            pack_into(frame, offset, *[record[name] for name in names])
+            offset += size
+        return bytes(frame)
+
+    def decode(self, frame:bytes|memoryview) -> dict:
+        values = self.header.unpack_from(frame, 0)
+        if not self.record:
+            return dict(zip(self.fields, values))
+        message = dict(zip(self.fields, values[:-1]))
+        start = self.header.size
+        end = start + self.record.size * values[-1]
+        if end > len(frame):
+            # Slicing would silently drop the missing records
+            raise struct.error(f"frame of {len(frame)} bytes is too short for {values[-1]} records")
+        names = self.record_fields
+        message[self.records_key] = [dict(zip(names, record)) for record in self.record.iter_unpack(frame[start:end])]
+        return message
+
+
+class Protocol:
+    '''Picks the codec for each message type
+
+    Message types registered with a binary codec are sent as binary frames starting with a 1 byte
+    type id, every other message is sent as JSON text, which keeps the login/reconnect flow in
+    communication.txt unchanged'''
+    def __init__(self) -> None:
+        self.json = JsonCodec()
+        self._by_type:dict[str, tuple[int, object]] = {}
+        self._by_id:dict[int, tuple[str, object]] = {}
+
+    def register(self, type_id:int, msg_type:str, codec):
+        '''Send `msg_type` messages with `codec`, which needs `encode(message) -> bytes` and `decode(data) -> dict`'''
+        if not 0 <= type_id <= 255:
+            raise ValueError("Binary message type id must fit in 1 byte")
+        if type_id in self._by_id and self._by_id[type_id][0] != msg_type:
+            raise ValueError(f"Binary message type id {type_id} is already used by {self._by_id[type_id][0]}")
+        self._by_type[msg_type] = (type_id, codec)
+        self._by_id[type_id] = (msg_type, codec)
+
+    def encode(self, message:dict) -> str|bytes:
+        binary = self._by_type.get(message.get("type"))
+        if not binary:
+            return self.json.encode(message)
+        type_id, codec = binary
+        return bytes((type_id,)) + codec.encode(message)
+
+    def decode(self, frame:str|bytes) -> dict|None:
+        if isinstance(frame, str):
+            message = self.json.decode(frame)
+            return message if isinstance(message, dict) else None
+        binary = self._by_id.get(frame[0]) if frame else None
+        if not binary:
+            return None
+        msg_type, codec = binary
+        message = codec.decode(memoryview(frame)[1:])
+        message["type"] = msg_type
+        return message
+
+
+SNAPSHOT = "snapshot"
+SNAPSHOT_DELTA = "snapshot_delta"
+SNAPSHOT_ACK = "snapshot_ack"
+SNAPSHOT_REQUEST = "snapshot_request"
+INPUT = "input"
+PLAYER_STATE = "player_state"
+PING = "ping"
+PONG = "pong"
+ENTITY_FIELDS = [("id", "H"), ("x", "f"), ("y", "f"), ("angle", "f"), ("health", "h")]
+INPUT_FIELDS = [("seq", "I"), ("dx", "b"), ("dy", "b"), ("angle", "f"), ("buttons", "B"), ("dt", "f")]
+
+
+class DeltaCodec:
+    '''Entity changes against a baseline snapshot, each entity only carries the fields that changed
+
+    Layout: header fields, changed entity count, removed entity count, then for every changed entity
+    its id, a 1 byte mask of the fields present and the present fields, then the removed ids
+
+    Parameters
+    ----------
+    fields: `list`
+        Entity fields, the first one is the id, at most 8 more
+    '''
+    def __init__(self, fields:list[tuple[str, str]] = ENTITY_FIELDS) -> None:
+        if len(fields) > 9:
+            raise ValueError("DeltaCodec supports at most 8 fields besides the id")
+        self.header = struct.Struct("<IIdHH")
+        self.id_name = fields[0][0]
+        self.entity = struct.Struct("<" + fields[0][1] + "B")
+        self.id = struct.Struct("<" + fields[0][1])
+        self.fields = [(name, struct.Struct("<" + fmt)) for name, fmt in fields[1:]]
+
+    def encode(self, message:dict) -> bytes:
+        entities, removed = message["entities"], message.get("removed", ())
+        frame = bytearray(self.header.pack(message["tick"], message["baseline"], message["server_time"], len(entities), len(removed)))
+        id_name = self.id_name
+        for entity in entities:
+            mask = 0
+            values = bytearray()
+            for bit, (name, field) in enumerate(self.fields):
+                if name in entity:
+                    mask |= 1 << bit
+                    values += field.pack(entity[name])
+            frame += self.entity.pack(entity[id_name], mask)
+            frame += values
+        for entity_id in removed:
+            frame += self.id.pack(entity_id)
+        return bytes(frame)
+
+    def decode(self, frame:bytes|memoryview) -> dict:
+        tick, baseline, server_time, changed, removed = self.header.unpack_from(frame, 0)
+        offset = self.header.size
+        entities = []
+        for _ in range(changed):
+            entity_id, mask = self.entity.unpack_from(frame, offset)
+            offset += self.entity.size
+            entity = {self.id_name: entity_id}
+            for bit, (name, field) in enumerate(self.fields):
+                if mask & (1 << bit):
+                    entity[name] = field.unpack_from(frame, offset)[0]
+                    offset += field.size
+            entities.append(entity)
+        end = offset + self.id.size * removed
+        if end > len(frame):
+            raise struct.error(f"frame of {len(frame)} bytes is too short for {removed} removed ids")
+        removed_ids = [entity_id for entity_id, in self.id.iter_unpack(frame[offset:end])]
+        return {"tick":tick, "baseline":baseline, "server_time":server_time, "entities":entities, "removed":removed_ids}
+
+
+def default_protocol() -> Protocol:
+    '''Protocol with the binary game messages registered'''
+    protocol = Protocol()
+    protocol.register(1, SNAPSHOT, StructCodec([("tick", "I"), ("server_time", "d")], ENTITY_FIELDS, "entities"))
+    protocol.register(2, SNAPSHOT_DELTA, DeltaCodec(ENTITY_FIELDS))
+    protocol.register(3, SNAPSHOT_ACK, StructCodec([("tick", "I")]))
+    protocol.register(4, SNAPSHOT_REQUEST, StructCodec())
+    protocol.register(5, INPUT, StructCodec(record_fields=INPUT_FIELDS, records_key="commands"))
+    protocol.register(6, PLAYER_STATE, StructCodec([("seq", "I"), ("x", "f"), ("y", "f"), ("angle", "f")]))
+    protocol.register(7, PING, StructCodec([("t0", "d")]))
+    protocol.register(8, PONG, StructCodec([("t0", "d"), ("t1", "d"), ("t2", "d")]))
+    return protocol
+
+
+class LatencyEstimator:
+    '''Round trip time, jitter and server clock offset from ping/pong timestamps
+
+    RTT and its variation are smoothed like TCP does, jitter like RTP (RFC 3550) and the clock
+    offset is averaged over the lowest RTT samples in the window, which are the least skewed
+    by queueing, like NTP does
+
+    Parameters
+    ----------
+    window: `int`
+        Number of recent samples kept
+    best: `int`
+        Number of lowest RTT samples the clock offset is averaged over
+    '''
+    def __init__(self, window:int = 32, best:int = 8) -> None:
+        self.best = best
+        self.rtt:float|None = None
+        self.last_rtt:float|None = None
+        self.sample_count = 0
+        self.rtt_variation = 0.0
+        self.jitter = 0.0
+        self.clock_offset = 0.0
+        self._samples:deque[tuple[float, float]] = deque(maxlen=window)
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+    @property
+    def timeout(self) -> float|None:
+        '''Time after which a reply can be considered lost'''
+        if self.rtt is None:
+            return None
+        return self.rtt + 4 * self.rtt_variation
+
+    def add_sample(self, t0:float, t1:float, t2:float, t3:float):
+        '''Add a sample from the client send, server receive, server send and client receive times'''
+        rtt = max(0.0, (t3 - t0) - (t2 - t1))
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        if self.rtt is None:
+            self.rtt = rtt
+            self.rtt_variation = rtt / 2
+        else:
+            self.jitter += (abs(rtt - self._samples[-1][0]) - self.jitter) / 16
+            self.rtt_variation += (abs(rtt - self.rtt) - self.rtt_variation) / 4
+            self.rtt += (rtt - self.rtt) / 8
+        self._samples.append((rtt, offset))
+        self.last_rtt = rtt
+        self.sample_count += 1
+        best = sorted(self._samples)[:self.best]
+        self.clock_offset = sum(offset for _, offset in best) / len(best)
+
+
 class Network:
-    def __init__(self, uri:str) -> None:
+    def __init__(self, uri:str, protocol:Protocol|None = None) -> None:
         self.uri = uri
+        self.protocol = protocol if protocol else default_protocol()
         self.websocket:websockets.WebSocketClientProtocol|None = None
         self.prev_id = None
         self.connected = False
@@ -14,63 +271,352 @@ class Network:
         self.on_connection_error = None
         self.on_error_do_default = True
         self.on_reconnect = None
+        self.session_id:str|None = None
+
+        # Reconnect policy, see set_reconnect_policy
+        self.backoff_base = 0.5
+        self.backoff_max = 30
+        self.max_attempts:int|None = None
+        self.connect_deadline:float|None = None
+        self._resuming = False
+
+        # The network thread owns the event loop and the websocket, the frame loop only touches the queues.
+        # deque.append and deque.popleft are atomic, so neither side ever waits on a lock.
+        self._loop:asyncio.AbstractEventLoop|None = None
+        self._thread:Thread|None = None
+        self._inbound = deque()
+        self._outbound = deque()
+        self._outbound_ready = asyncio.Event()
+        self._tasks:list[asyncio.Task] = []
+        self._connecting = None
+        self._closing = False
+
+        self.messages_sent = 0
+        self.messages_received = 0
+        # Frames the protocol couldn't decode, counted instead of logged so a bad peer can't flood the output
+        self.messages_dropped = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        self._handlers:dict[str, list[Callable]] = {}
+        self.dispatch_max_messages = 256
+        self.dispatch_budget = 0.004
+        self.on(LOGIN_RESULT, self._on_login_result)
+        self.on(CONNECTION_ERROR, self._notify_connection_error)
+
+        self.latency = LatencyEstimator()
+        self.ping_interval = 1.0
+        # Pings queued before a reconnect are answered after it, their round trip includes the outage
+        self._connected_at = 0.0
     
-    def start_connection(self):
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(self.connect())
+    def start_connection(self, loop:asyncio.AbstractEventLoop|None = None):
+        '''Connect in the background, returns immediately
 
+        Parameters
+        ----------
+        loop: `asyncio.AbstractEventLoop`
+            Run on this event loop instead of starting a network thread, so many clients
+            can share one loop. Use `aclose` instead of `close` to disconnect
+        '''
+        if self._loop:
+            return
+        self._closing = False
+        if loop:
+            self._loop = loop
+        else:
+            self._loop = asyncio.new_event_loop()
+            self._thread = Thread(target=self._run_loop, name="network", daemon=True)
+            self._thread.start()
+        self._connecting = asyncio.run_coroutine_threadsafe(self.connect(), self._loop)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        self._loop.close()
 
     def set_on_connection_error(self, func:Callable, do_default = True):
+        '''Set action when the connection is lost or connecting gives up, called from `dispatch`
+
+        Parameters
+        ----------
+        func
+            Function to be called, take in no arguments
+        do_default: `bool`
+            Reconnect with the reconnect policy after losing the connection
+        '''
         self.on_connection_error = func
         self.on_error_do_default = do_default
 
-    async def connect(self):
-        print("run")
+    def set_reconnect_policy(self, backoff_base:float = 0.5, backoff_max:float = 30, max_attempts:int|None = None, deadline:float|None = None):
+        '''Set how connection attempts are retried
+
+        Waits between attempts grow exponentially with full jitter, so clients do not retry in lockstep
+        when the server restarts
+
+        Parameters
+        ----------
+        backoff_base: `float`
+            Upper bound of the first wait in seconds, doubled after every failed attempt
+        backoff_max: `float`
+            Largest upper bound of a wait in seconds
+        max_attempts: `int`
+            Give up after this many failed attempts, None to retry forever
+        deadline: `float`
+            Give up after this many seconds, None to retry forever
+        '''
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.connect_deadline = deadline
+
+    def backoff_delay(self, attempt:int) -> float:
+        '''Seconds to wait before retrying after `attempt` failed attempts'''
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** min(attempt - 1, 32)))
+
+    async def connect(self) -> bool:
+        '''Connect with the reconnect policy, resumes the previous session if there is one
+
+        Returns whether a connection was made, `on_connection_error` is called by `dispatch` when giving up'''
+        attempt = 0
+        started = time.perf_counter()
         while not self.connected:
             try:
                 self.websocket = await websockets.connect(self.uri)
-            except ConnectionRefusedError:
-                self.connected = False
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake):
+                attempt += 1
+                delay = self.backoff_delay(attempt)
+                out_of_attempts = self.max_attempts is not None and attempt >= self.max_attempts
+                out_of_time = self.connect_deadline is not None and time.perf_counter() - started + delay > self.connect_deadline
+                if out_of_attempts or out_of_time:
+                    self._inbound.append({"type":CONNECTION_ERROR, "time":time.perf_counter()})
+                    return False
+                await asyncio.sleep(delay)
                 continue
             
             self.connected = True
+            self._connected_at = time.perf_counter()
+            if self.prev_id:
+                # Resume before anything queued while disconnected is sent
+                self._resuming = True
+                self._outbound.appendleft(self.protocol.encode({"mode":"reconnect", "prev_id":self.prev_id}))
+            self._tasks = [asyncio.create_task(self._read(self.websocket)),
+                           asyncio.create_task(self._write(self.websocket)),
+                           asyncio.create_task(self._ping())]
             if self.on_connect:
                 self.on_connect()
-        print("done")
+        return True
     
     def set_on_connect(self, func:Callable):
+        '''Set action when connected, called from the network thread'''
         self.on_connect = func
     
     def set_on_reconnect(self, func:Callable):
+        '''Set action when the previous session is resumed after a reconnect, called from `dispatch`
+
+        Parameters
+        ----------
+        func
+            Function to be called, take in 1 argument: the login_result of the reconnect
+        '''
         self.on_reconnect = func
 
-    def _on_connection_error(self):
-        self.connected = False
-        self.prev_id = self.websocket.id
+    def _track_session(self, message:dict):
+        # Runs on the network thread as soon as the reply arrives, so a disconnect right after
+        # logging in still resumes the right session
+        if self._resuming:
+            self._resuming = False
+            message["resumed"] = not message["failed"]
+        if not message["failed"]:
+            self.session_id = message["id"]
+        elif message.get("resumed") is False:
+            self.session_id = self.prev_id = None
+
+    def _on_login_result(self, message:dict):
+        if message.get("resumed") and self.on_reconnect:
+            self.on_reconnect(message)
+
+    def _notify_connection_error(self, message:dict):
         if self.on_connection_error:
             self.on_connection_error()
+
+    def _on_connection_error(self):
+        if not self.connected:
+            return
+        self.connected = False
+        self.prev_id = self.session_id
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        # The callback touches game state, it runs on the frame loop like the message handlers
+        self._inbound.append({"type":CONNECTION_ERROR, "time":time.perf_counter()})
         if not self.on_error_do_default:
             return
-        asyncio.run_coroutine_threadsafe(self.connect(), self._loop)
-    
-    async def send(self, data):
-        if not self.websocket:
-            return False
+        self._connecting = asyncio.run_coroutine_threadsafe(self.connect(), self._loop)
+
+    async def _read(self, websocket):
         try:
-            await self.websocket.send(data)
-            return True
-        except websockets.ConnectionClosedError as e:
+            async for frame in websocket:
+                self.messages_received += 1
+                self.bytes_received += len(frame)
+                with profiler.section("network.recv"):
+                    message = self._decode(frame)
+                    if message is None:
+                        continue
+                    msg_type = message_type(message)
+                    if msg_type == PONG:
+                        if message["t0"] >= self._connected_at:
+                            self.latency.add_sample(message["t0"], message["t1"], message["t2"], time.perf_counter())
+                        continue
+                    if msg_type == LOGIN_RESULT:
+                        self._track_session(message)
+                    self._inbound.append(message)
+        except websockets.ConnectionClosed:
+            pass
+        if not self._closing:
             self._on_connection_error()
-            raise e
-    
-    async def recv(self):
-        if not self.websocket:
-            return False
+
+    async def _write(self, websocket):
+        while True:
+            while self._outbound:
+                # Popped before sending, _ping puts frames at the head while send is waiting on the socket
+                frame = self._outbound.popleft()
+                try:
+                    with profiler.section("network.send"):
+                        await websocket.send(frame)
+                except websockets.ConnectionClosed:
+                    # Keep the message queued, it is sent again after reconnecting
+                    self._outbound.appendleft(frame)
+                    return
+                except asyncio.CancelledError:
+                    # Cancelled mid send when the read side saw the connection close first
+                    self._outbound.appendleft(frame)
+                    raise
+                self.messages_sent += 1
+                self.bytes_sent += len(frame)
+            self._outbound_ready.clear()
+            await self._outbound_ready.wait()
+
+    async def _ping(self):
+        while True:
+            # The server expects the login or reconnect message first.
+            # After that pings skip the queue so they measure the network, not the backlog
+            if self.session_id and not self._resuming:
+                self._outbound.appendleft(self.protocol.encode({"type":PING, "t0":time.perf_counter()}))
+                self._outbound_ready.set()
+            await asyncio.sleep(self.ping_interval)
+
+    @property
+    def rtt(self) -> float|None:
+        '''Smoothed round trip time in seconds, None before the first pong'''
+        return self.latency.rtt
+
+    @property
+    def jitter(self) -> float:
+        '''Mean variation between consecutive round trip times in seconds'''
+        return self.latency.jitter
+
+    @property
+    def clock_offset(self) -> float:
+        '''Server clock minus time.perf_counter in seconds'''
+        return self.latency.clock_offset
+
+    def server_time(self) -> float:
+        '''Estimated current time on the server clock'''
+        return time.perf_counter() + self.latency.clock_offset
+
+    def post(self, message:dict|str|bytes):
+        '''Queue a message to be sent by the network thread, never blocks
+
+        Dict messages are encoded with `protocol`, str and bytes are sent as they are.
+        Messages posted while disconnected are kept and sent once connected'''
+        with profiler.section("network.post"):
+            if isinstance(message, dict):
+                message = self.protocol.encode(message)
+            self._outbound.append(message)
+            if self._loop:
+                self._loop.call_soon_threadsafe(self._outbound_ready.set)
+
+    def _decode(self, frame:str|bytes) -> dict|None:
         try:
-            return await asyncio.wait_for(self.websocket.recv(), 5)
-        except websockets.ConnectionClosedError:
-            self._on_connection_error()
-            return False
+            message = self.protocol.decode(frame)
+        except (ValueError, struct.error):
+            message = None
+        if message is None:
+            self.messages_dropped += 1
+        return message
+
+    def on(self, msg_type:str, func:Callable):
+        '''Register a handler for a message type, handlers are called by `dispatch`
+
+        Parameters
+        ----------
+        msg_type: `str`
+            Message type, replies to login/signup/reconnect are typed as "login_result"
+        func
+            Function to be called, take in 1 argument: the decoded message
+        '''
+        self._handlers.setdefault(msg_type, []).append(func)
+
+    def off(self, msg_type:str, func:Callable):
+        '''Remove a handler registered with `on`'''
+        handlers = self._handlers.get(msg_type)
+        if handlers and func in handlers:
+            handlers.remove(func)
+
+    def dispatch(self, max_messages:int|None = None, budget:float|None = None) -> int:
+        '''Call the registered handlers for received messages, called once every frame
+
+        Stops after `max_messages` messages or `budget` seconds, whichever comes first,
+        the rest stay queued for the next frame. Returns the number of messages handled'''
+        if max_messages is None:
+            max_messages = self.dispatch_max_messages
+        if budget is None:
+            budget = self.dispatch_budget
+        deadline = time.perf_counter() + budget
+        handled = 0
+        with profiler.section("network.dispatch"):
+            while self._inbound and handled < max_messages:
+                message = self._inbound.popleft()
+                for handler in self._handlers.get(message_type(message), ()):
+                    handler(message)
+                handled += 1
+                if time.perf_counter() >= deadline:
+                    break
+        return handled
+
+    def drain(self) -> list:
+        '''Take every message received since the last call without dispatching them, never blocks
+
+        Lost connections show up as messages typed `CONNECTION_ERROR` where they happened'''
+        messages = []
+        while self._inbound:
+            messages.append(self._inbound.popleft())
+        return messages
+
+    def close(self, timeout:float = 1):
+        '''Close the websocket and stop the network thread'''
+        if not self._thread:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result(timeout)
+        except (TimeoutError, asyncio.TimeoutError):
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._loop = None
+
+    async def aclose(self):
+        '''Close the websocket from the event loop the network runs on'''
+        self._closing = True
+        if self._connecting:
+            self._connecting.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.websocket:
+            await self.websocket.close()
+        self.connected = False
 
         
 
@@ -0,0 +1,116 @@
+import math
+from collections import deque
+from typing import Callable
+
+from network import Network, INPUT, PLAYER_STATE
+
+PLAYER_SPEED = 300
+
+
+def move_player(state: dict, command: dict) -> dict:
+    '''Default movement, must match the server simulation for predictions to hold
+
+    Parameters
+    ----------
+    state: `dict`
+        Player state with x, y and angle
+    command: `dict`
+        Input command with dx, dy in -1..1, angle and dt
+    '''
+    dx, dy = command["dx"], command["dy"]
+    length = math.hypot(dx, dy)
+    if length > 1:
+        dx, dy = dx / length, dy / length
+    return {"x": state["x"] + dx * PLAYER_SPEED * command["dt"],
+            "y": state["y"] + dy * PLAYER_SPEED * command["dt"],
+            "angle": command["angle"]}
+
+
+class Predictor:
+    '''
+        Client side prediction of the local player with server reconciliation
+
+        Usage
+        ------------
+        Call `apply` with the input of every simulation step, it moves `state` immediately. Call `flush`
+        once per frame or input tick to send every new command in one message, together with the last
+        `redundancy` unacknowledged commands so a lost message does not lose input, the server skips
+        sequence numbers it has already processed. On every authoritative player state the
+        acknowledged commands are dropped and the remaining ones are replayed on top of the server position
+
+        Parameters
+        ----------
+        network: `Network`
+            Network to send commands with and receive player states from
+        state: `dict`
+            Starting player state
+        simulate
+            Function taking in (state, command) and returning the new state
+        capacity: `int`
+            Maximum number of unacknowledged commands kept for replay
+        redundancy: `int`
+            Number of already sent, unacknowledged commands resent with every flush
+    '''
+
+    def __init__(self,
+                 network: Network,
+                 state: dict | None = None,
+                 simulate: Callable[[dict, dict], dict] = move_player,
+                 capacity: int = 128,
+                 redundancy: int = 3) -> None:
+        self.network = network
+        self.state = state if state else {"x": 0.0, "y": 0.0, "angle": 0.0}
+        self.simulate = simulate
+        self.seq = 0
+        self.acknowledged_seq = 0
+        self.redundancy = redundancy
+        self.pending: deque[dict] = deque(maxlen=capacity)
+        self._unsent = 0
+        self._on_correction = None
+
+        network.on(PLAYER_STATE, self._on_player_state)
+
+    def set_on_correction(self, func: Callable):
+        '''Set action when the server state differs from the prediction
+
+        Parameters
+        ----------
+        func
+            Function to be called, take in 2 arguments: self, the predicted state before the correction
+        '''
+        self._on_correction = func
+
+    def apply(self, dx: int, dy: int, angle: float, buttons: int, dt: float) -> dict:
+        '''Predict one step of local input, returns the predicted state, the command is sent by `flush`'''
+        self.seq += 1
+        command = {"seq": self.seq, "dx": dx, "dy": dy, "angle": angle, "buttons": buttons, "dt": dt}
+        self.pending.append(command)
+        self._unsent = min(self._unsent + 1, len(self.pending))
+        self.state = self.simulate(self.state, command)
+        return self.state
+
+    def flush(self) -> bool:
+        '''Send the commands applied since the last flush in one message, returns whether anything was sent'''
+        if not self._unsent:
+            return False
+        count = min(self._unsent + self.redundancy, len(self.pending))
+        commands = [self.pending[index] for index in range(len(self.pending) - count, len(self.pending))]
+        self.network.post({"type": INPUT, "commands": commands})
+        self._unsent = 0
+        return True
+
+    def _on_player_state(self, message: dict):
+        if message["seq"] < self.acknowledged_seq:
+            return
+        self.acknowledged_seq = message["seq"]
+        while self.pending and self.pending[0]["seq"] <= self.acknowledged_seq:
+            self.pending.popleft()
+        self._unsent = min(self._unsent, len(self.pending))
+
+        predicted = self.state
+        state = {"x": message["x"], "y": message["y"], "angle": message["angle"]}
+        for command in self.pending:
+            state = self.simulate(state, command)
+        self.state = state
+        if self._on_correction and (abs(state["x"] - predicted["x"]) > 0.01 or abs(state["y"] - predicted["y"]) > 0.01):
+            self._on_correction(self, predicted)
@@ -0,0 +1,215 @@
+'''
+    Frame time profiler with scoped section timers, an on-screen overlay and dumps for offline comparison
+
+    Wrap the work to measure in `with profiler.section("ui.draw"):` and call `profiler.frame()` once per
+    frame. While disabled, sections cost one method call and record nothing. Enable it with the F3 key
+    in the clients, or PROFILE=1 in the environment
+
+    python profiler.py old.json new.json --threshold 0.1
+'''
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+
+def percentile(values: list, p: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples: deque) -> None:
+        self.samples = samples
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    '''
+        Rolling timings of named sections and of whole frames
+
+        Usage
+        ------------
+        `with profiler.section("network.dispatch"):` times a block, `frame` is called once at the end of
+        every frame. `draw_overlay` shows p50/p99 per section and a frame time graph, `dump` writes the
+        same numbers to a json file that `compare` or `python profiler.py` diff between builds.
+        Sections may be timed from other threads, like the network thread
+
+        Parameters
+        ----------
+        enabled: `bool`
+            Whether sections are recorded
+        window: `int`
+            Samples kept per section and frames kept for the graph
+        frame_budget: `float`
+            Target frame time in seconds, drawn as a line on the graph
+    '''
+
+    def __init__(self, enabled: bool = False, window: int = 300, frame_budget: float = 1 / 60) -> None:
+        self.enabled = enabled
+        self.window = window
+        self.frame_budget = frame_budget
+        self._sections: dict[str, deque] = {}
+        self._frames: deque = deque(maxlen=window)
+        self._last_frame: float | None = None
+        self._font = None
+
+    def section(self, name: str):
+        '''Context manager timing its block under `name`'''
+        if not self.enabled:
+            return _NULL_SECTION
+        samples = self._sections.get(name)
+        if samples is None:
+            samples = self._sections.setdefault(name, deque(maxlen=self.window))
+        return _Section(samples)
+
+    def record(self, name: str, seconds: float):
+        '''Add a timing measured elsewhere'''
+        if self.enabled:
+            self._sections.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def frame(self):
+        '''Mark the end of a frame, the time since the last call is the frame time'''
+        now = time.perf_counter()
+        if self.enabled and self._last_frame is not None:
+            self._frames.append(now - self._last_frame)
+        self._last_frame = now
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._last_frame = None
+
+    def reset(self):
+        self._sections.clear()
+        self._frames.clear()
+        self._last_frame = None
+
+    @staticmethod
+    def _summarize(samples) -> dict:
+        values = list(samples)
+        return {"count": len(values),
+                "p50": percentile(values, 50),
+                "p99": percentile(values, 99),
+                "max": max(values) if values else None}
+
+    def stats(self) -> dict:
+        '''Rolling count, p50, p99 and max in seconds per section, and of the frame time under "frame"'''
+        stats = {name: self._summarize(samples) for name, samples in sorted(self._sections.items())}
+        stats["frame"] = self._summarize(self._frames)
+        return stats
+
+    def dump(self, path: str):
+        '''Write `stats` to a json file'''
+        with open(path, "w") as file:
+            json.dump({"time": time.time(), "window": self.window, "sections": self.stats()}, file, indent=2)
+
+    def draw_overlay(self, screen, pos: tuple = (10, 10)):
+        '''Draw p50/p99 per section and the frame time graph on `screen`, returns the covered rect
+
+        The overlay is drawn over whatever is on the screen, with a RenderManager invalidate the rect
+        so the next frame draws the widgets below it again'''
+        # pygame is only needed for the overlay, the server and load test time sections without it
+        import pygame
+
+        if self._font is None:
+            self._font = pygame.font.Font(None, 18)
+        font = self._font
+        rows = [("section", "p50 ms", "p99 ms")]
+        for name, summary in self.stats().items():
+            if summary["count"]:
+                rows.append((name, f"{summary['p50'] * 1000:.2f}", f"{summary['p99'] * 1000:.2f}"))
+        # The font isn't monospaced, columns are placed by their rendered widths
+        name_width = max(font.size(row[0])[0] for row in rows) + 10
+        number_width = max(font.size(value)[0] for row in rows for value in row[1:]) + 10
+        line_height = font.get_linesize()
+        graph_height = 60
+        width = max(name_width + number_width * 2, self.window) + 10
+        height = line_height * len(rows) + graph_height + 15
+
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        for index, row in enumerate(rows):
+            y = 5 + index * line_height
+            overlay.blit(font.render(row[0], True, (255, 255, 255)), (5, y))
+            for column, value in enumerate(row[1:], 1):
+                text = font.render(value, True, (255, 255, 255))
+                overlay.blit(text, (5 + name_width + number_width * column - text.get_width(), y))
+
+        # Frame times, scaled so twice the budget fills the graph
+        graph_bottom = height - 5
+        scale = graph_height / (self.frame_budget * 2)
+        budget_y = graph_bottom - round(self.frame_budget * scale)
+        pygame.draw.line(overlay, (255, 255, 0), (5, budget_y), (width - 5, budget_y))
+        for index, frame_time in enumerate(self._frames):
+            bar = min(graph_height, round(frame_time * scale))
+            color = (0, 200, 0) if frame_time <= self.frame_budget else (220, 40, 40)
+            pygame.draw.line(overlay, color, (5 + index, graph_bottom), (5 + index, graph_bottom - bar))
+        return screen.blit(overlay, pos)
+
+
+profiler = Profiler(enabled=bool(os.environ.get("PROFILE")))
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1) -> list[str]:
+    '''Sections of two dumps whose p50 or p99 got slower by more than `threshold` as a fraction'''
+    regressions = []
+    for name, new_summary in new["sections"].items():
+        old_summary = old["sections"].get(name)
+        if not old_summary:
+            continue
+        for key in ("p50", "p99"):
+            if old_summary[key] and new_summary[key] and new_summary[key] > old_summary[key] * (1 + threshold):
+                regressions.append(name)
+                break
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", help="dump of the reference build")
+    parser.add_argument("new", help="dump to check")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown as a fraction")
+    args = parser.parse_args()
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    regressions = compare(old, new, args.threshold)
+    print(f"{'section':<32}{'old p50':>10}{'new p50':>10}{'old p99':>10}{'new p99':>10}")
+    for name, new_summary in new["sections"].items():
+        old_summary = old["sections"].get(name, {})
+        values = [old_summary.get("p50"), new_summary["p50"], old_summary.get("p99"), new_summary["p99"]]
+        columns = "".join(f"{value * 1000:>10.3f}" if value is not None else f"{'-':>10}" for value in values)
+        print(f"{name:<32}{columns}{'  slower' if name in regressions else ''}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,43 @@
-from .button import ButtonRect, ButtonCircle
-from .textinput import TextInput
-from .toggle import ToggleButtonRect, ToggleButtonCircle
-from .radio import RadioInput, RadioSelection
\ No newline at end of file
+from importlib import import_module
+
+# Submodules are imported on first use, so importing the package is cheap and has no side effects
+_EXPORTS = {
+    "ButtonRect": ".button",
+    "ButtonCircle": ".button",
+    "TextInput": ".textinput",
+    "ToggleButtonRect": ".toggle",
+    "ToggleButtonCircle": ".toggle",
+    "RadioInput": ".radio",
+    "RadioSelection": ".radio",
+    "TextCache": ".cache",
+    "text_cache": ".cache",
+    "render_text": ".cache",
+    "ShapeCache": ".cache",
+    "shape_cache": ".cache",
+    "render_shape": ".cache",
+    "ScaleCache": ".cache",
+    "scale_cache": ".cache",
+    "scale_image": ".cache",
+    "RenderManager": ".render",
+    "WidgetManager": ".manager",
+    "TextBuffer": ".textbuffer",
+    "FontRegistry": ".fonts",
+    "font_registry": ".fonts",
+    "default_font": ".fonts",
+    "GlyphAtlas": ".glyph_atlas",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
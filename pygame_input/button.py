@@ -1,8 +1,21 @@
 import pygame
 from pygame.surface import Surface as Surface
+from .cache import render_shape, render_text, scale_image
+from .fonts import default_font
+from .retained import Retained
+
+
+class ButtonRect(Retained):
+    _appearance_attrs = frozenset((
+        "width", "height", "display_dwidth", "display_dheight",
+        "border_radius", "border_top_left_radius", "border_top_right_radius",
+        "border_bottom_left_radius", "border_bottom_right_radius",
+        "background_image", "smooth_scale", "color", "padding", "outline_color", "outline_width",
+        "label_text", "label_font", "label_color"))
+    _layout_attrs = frozenset((
+        "x", "y", "width", "height", "display_dx", "display_dy",
+        "display_dwidth", "display_dheight", "outline_width"))
 
-
-class ButtonRect:
     def __init__(
             self,
             x: int,
@@ -38,8 +51,9 @@ class ButtonRect:
         self.border_top_right_radius = border_radius
         self.border_bottom_left_radius = border_radius
         self.border_bottom_right_radius = border_radius
-        self.background_image = pygame.transform.scale(
-            background_image, (width, height)) if background_image else None
+        # Kept unscaled, scaled copies for every size come from the shared scale cache
+        self.background_image = background_image
+        self.smooth_scale = False
         self.color = color
         self.padding = padding
         self.outline_color = outline_color
@@ -65,9 +79,6 @@ class ButtonRect:
             raise ValueError(
                 "Height and Width must be bigger than 2 times of padding")
 
-    @property
-    def rect(self): return pygame.Rect(self.x, self.y, self.width, self.height)
-
     @property
     def display_rect(self): return pygame.Rect(
         self.x + self.display_dx,
@@ -75,6 +86,13 @@ class ButtonRect:
         self.width + self.display_dwidth,
         self.height + self.display_dheight)
 
+    @property
+    def bounding_rect(self) -> pygame.Rect:
+        '''Screen area covered by `draw`, including the outline and a label sticking out of the button'''
+        return self._composed_rect().move(
+            self.x + self.display_dx - self.outline_width,
+            self.y + self.display_dy - self.outline_width)
+
     @display_rect.setter
     def display_rect(self, x, y, width, height):
         self.display_rect = pygame.Rect(x, y, width, height)
@@ -90,17 +108,25 @@ class ButtonRect:
         self.border_bottom_left_radius = border_bottom_left_radius
         self.border_bottom_right_radius = border_bottom_right_radius
 
-    def set_background_image(self, image: pygame.Surface):
-        self.background_image = pygame.transform.scale(
-            image, (self.width, self.height))
+    def set_background_image(self, image: pygame.Surface, smooth: bool = False):
+        '''Set the image drawn inside the outline, scaled to the button's size
+
+        Parameters
+        ----------
+        image: `pygame.Surface`
+            The image, kept as it is and must not be modified afterwards
+        smooth: `bool`
+            Scale it with `pygame.transform.smoothscale`
+        '''
+        self.background_image = image
+        self.smooth_scale = smooth
 
     def set_label(
-        self, text: str, font: pygame.font.Font = pygame.font.Font(
-            None, 10), color: tuple = (
+        self, text: str, font: pygame.font.Font | None = None, color: tuple = (
             0, 0, 0)):
-        '''Set the text, font and text color of the text on the button'''
+        '''Set the text, font and text color of the text on the button, pygame's default font at size 10 if no font is given'''
         self.label_text = text
-        self.label_font = font
+        self.label_font = font if font else default_font(10)
         self.label_color = color
 
     def set_activate_action(self, on_active, on_inactive):
@@ -205,47 +231,59 @@ class ButtonRect:
                     if self._on_click_action:
                         self._on_click_action(self)
 
-    def draw(self, screen: pygame.Surface):
-        pygame.draw.rect(
-            screen,
+    def _composed_rect(self) -> pygame.Rect:
+        # Relative to the outline's top left corner, the label isn't clipped to the button
+        rect = pygame.Rect(
+            0, 0,
+            self.width + self.display_dwidth + self.outline_width * 2,
+            self.height + self.display_dheight + self.outline_width * 2)
+        if self.label_font:
+            label_size = render_text(self.label_font, self.label_text, True, self.label_color).get_size()
+            offset = self.outline_width + self.padding
+            rect.union_ip(pygame.Rect((offset, offset), label_size))
+        return rect
+
+    def _compose(self) -> pygame.Surface:
+        width = self.width + self.display_dwidth
+        height = self.height + self.display_dheight
+        shape = render_shape(
+            (width, height),
+            (self.border_radius,
+             self.border_top_left_radius,
+             self.border_top_right_radius,
+             self.border_bottom_left_radius,
+             self.border_bottom_right_radius),
+            self.outline_width,
             self.outline_color,
-            (self.display_rect.x - self.outline_width,
-             self.display_rect.y - self.outline_width,
-             self.display_rect.width + self.outline_width * 2,
-             self.display_rect.height + self.outline_width * 2),
-            border_radius=self.border_radius,
-            border_top_left_radius=self.border_top_left_radius,
-            border_top_right_radius=self.border_top_right_radius,
-            border_bottom_left_radius=self.border_bottom_left_radius,
-            border_bottom_right_radius=self.border_bottom_right_radius)
-        if self.background_image:
-            match_width = self.background_image.get_width() == self.display_rect.width
-            match_height = self.background_image.get_height() == self.display_rect.height
-            if not match_width or not match_height:
-                self.background_image = pygame.transform.scale(
-                    self.background_image,
-                    (self.width + self.display_dwidth,
-                     self.height + self.display_dheight))
-            screen.blit(self.background_image, self.display_rect)
+            None if self.background_image else self.color)
+        if not self.background_image and not self.label_font:
+            # Nothing is drawn over the shape, buttons of the same size and style share it
+            return shape
+
+        area = self._composed_rect()
+        if area.size == shape.get_size():
+            surface = shape.copy()
         else:
-            pygame.draw.rect(
-                screen,
-                self.color,
-                self.display_rect,
-                0,
-                self.border_radius,
-                self.border_top_left_radius,
-                self.border_top_right_radius,
-                self.border_bottom_left_radius,
-                self.border_bottom_right_radius)
+            surface = pygame.Surface(area.size, pygame.SRCALPHA, 32)
+            surface.blit(shape, (-area.x, -area.y))
+        inner_rect = pygame.Rect(
+            self.outline_width - area.x, self.outline_width - area.y, width, height)
+        if self.background_image:
+            surface.blit(
+                scale_image(self.background_image, (width, height), self.smooth_scale),
+                inner_rect)
 
         if self.label_font:
-            label_surface = self.label_font.render(
-                self.label_text, True, self.label_color)
-            screen.blit(
+            label_surface = render_text(
+                self.label_font, self.label_text, True, self.label_color)
+            surface.blit(
                 label_surface,
-                (self.display_rect.x + self.padding,
-                 self.display_rect.y + self.padding))
+                (inner_rect.x + self.padding,
+                 inner_rect.y + self.padding))
+        return surface
+
+    def draw(self, screen: pygame.Surface):
+        screen.blit(self.composed_surface, self.bounding_rect)
 
 
 class ButtonCircle(ButtonRect):
@@ -0,0 +1,208 @@
+import pygame
+from collections import OrderedDict
+
+
+class _SurfaceCache:
+    '''LRU of shared surfaces bounded by their memory, least recently used ones are dropped first'''
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: OrderedDict[tuple, tuple[pygame.Surface, int]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _get(self, key: tuple) -> pygame.Surface | None:
+        cached = self._surfaces.get(key)
+        if cached:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def _put(self, key: tuple, surface: pygame.Surface) -> pygame.Surface:
+        size = surface.get_pitch() * surface.get_height()
+        if size > self.max_bytes:
+            return surface
+        self._surfaces[key] = (surface, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._surfaces.popitem(last=False)
+            self.bytes -= evicted_size
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self.bytes = 0
+
+
+class TextCache(_SurfaceCache):
+    '''
+        LRU cache of rendered text surfaces, shared by every widget
+
+        Usage
+        ------------
+        Use `render` in place of `font.render`, the returned surface is shared and must not be modified
+
+        Parameters
+        ----------
+        max_bytes: `int`
+            Memory bound of the cached surfaces, least recently used ones are dropped first
+    '''
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024) -> None:
+        super().__init__(max_bytes)
+
+    def render(self,
+               font: pygame.font.Font,
+               text: str,
+               antialias: bool,
+               color: tuple,
+               background: tuple | None = None) -> pygame.Surface:
+        '''Same as `font.render`, rendered once per font, style, text and colors'''
+        if not isinstance(color, tuple):
+            color = tuple(color)
+        if background is not None and not isinstance(background, tuple):
+            background = tuple(background)
+        key = (font, font.bold, font.italic, font.underline, text, color, antialias, background)
+        surface = self._get(key)
+        if surface is None:
+            surface = self._put(key, font.render(text, antialias, color, background))
+        return surface
+
+
+text_cache = TextCache()
+
+
+def render_text(font: pygame.font.Font,
+                text: str,
+                antialias: bool,
+                color: tuple,
+                background: tuple | None = None) -> pygame.Surface:
+    '''Render text through the shared `text_cache`, the returned surface must not be modified'''
+    return text_cache.render(font, text, antialias, color, background)
+
+
+class ShapeCache(_SurfaceCache):
+    '''
+        LRU cache of widget backgrounds, a rounded rect outline with the fill inside it, shared by every widget
+
+        Usage
+        ------------
+        Use `render` in place of drawing the outline and fill, widgets of the same size and style get
+        the same surface, which is shared and must not be modified, copy it to draw on it
+
+        Parameters
+        ----------
+        max_bytes: `int`
+            Memory bound of the cached surfaces, least recently used ones are dropped first
+    '''
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024) -> None:
+        super().__init__(max_bytes)
+
+    def render(self,
+               size: tuple,
+               radii: tuple,
+               outline_width: int,
+               outline_color: tuple,
+               color: tuple | None) -> pygame.Surface:
+        '''Outline and fill of a widget, drawn once per size and style
+
+        Parameters
+        ----------
+        size: `tuple`
+            Width and height inside the outline
+        radii: `tuple`
+            border_radius, then the top left, top right, bottom left and bottom right radius
+        outline_width: `int`
+            Width of the outline around `size`
+        outline_color: `tuple`
+            Color of the outline
+        color: `tuple` | `None`
+            Fill color, None to leave the inside transparent for a background image
+        '''
+        if not isinstance(outline_color, tuple):
+            outline_color = tuple(outline_color)
+        if color is not None and not isinstance(color, tuple):
+            color = tuple(color)
+        key = (tuple(size), tuple(radii), outline_width, outline_color, color)
+        surface = self._get(key)
+        if surface is None:
+            surface = self._put(key, _draw_shape(*key))
+        return surface
+
+
+def _draw_shape(size: tuple, radii: tuple, outline_width: int, outline_color: tuple, color: tuple | None) -> pygame.Surface:
+    width, height = size
+    surface = pygame.Surface((width + outline_width * 2, height + outline_width * 2), pygame.SRCALPHA, 32)
+    pygame.draw.rect(surface, outline_color, surface.get_rect(), 0, *radii)
+    if color is not None:
+        pygame.draw.rect(surface, color, (outline_width, outline_width, width, height), 0, *radii)
+    return surface
+
+
+shape_cache = ShapeCache()
+
+
+def render_shape(size: tuple,
+                 radii: tuple,
+                 outline_width: int,
+                 outline_color: tuple,
+                 color: tuple | None) -> pygame.Surface:
+    '''Draw a widget's outline and fill through the shared `shape_cache`, the returned surface must not be modified'''
+    return shape_cache.render(size, radii, outline_width, outline_color, color)
+
+
+class ScaleCache(_SurfaceCache):
+    '''
+        LRU cache of scaled images, shared by every widget
+
+        Usage
+        ------------
+        Use `scale` in place of `pygame.transform.scale`, always from the original image, so resizing back and
+        forth, like a button growing on hover, scales it once per size and never scales a scaled copy. The
+        original image must not be modified after it is scaled, and the returned surface is shared and must
+        not be modified either
+
+        Parameters
+        ----------
+        max_bytes: `int`
+            Memory bound of the cached surfaces, least recently used ones are dropped first
+    '''
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024) -> None:
+        super().__init__(max_bytes)
+
+    def scale(self, image: pygame.Surface, size: tuple, smooth: bool = False) -> pygame.Surface:
+        '''`image` scaled to `size`, with `pygame.transform.smoothscale` if `smooth`'''
+        size = tuple(size)
+        if image.get_size() == size:
+            return image
+        key = (image, size, smooth)
+        surface = self._get(key)
+        if surface is None:
+            # smoothscale only takes 24 and 32 bit images
+            if smooth and image.get_bitsize() in (24, 32):
+                surface = pygame.transform.smoothscale(image, size)
+            else:
+                surface = pygame.transform.scale(image, size)
+            surface = self._put(key, surface)
+        return surface
+
+
+scale_cache = ScaleCache()
+
+
+def scale_image(image: pygame.Surface, size: tuple, smooth: bool = False) -> pygame.Surface:
+    '''Scale an image through the shared `scale_cache`, the returned surface must not be modified'''
+    return scale_cache.scale(image, size, smooth)
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from typing import Iterable
+
+import pygame
+
+
+class FontRegistry:
+    '''
+        Loads every font once per file, size and style and hands out the shared instance
+
+        Usage
+        ------------
+        Use `get` in place of `pygame.font.Font`, the returned font is shared by every caller and must not
+        be modified, e.g. set_bold, get it with `bold=True` instead. `preload` and `preload_theme` load a
+        set of fonts on a background thread, e.g. while a loading screen is shown, so `get` finds them
+        already parsed. Only the registry takes the lock, start a background preload after other code
+        like pygame_gui's UIManager has loaded its fonts
+    '''
+
+    def __init__(self) -> None:
+        self._fonts: dict[tuple, pygame.font.Font] = {}
+        # SDL_ttf shares one FreeType library between fonts, fonts are only opened while holding the lock
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._fonts)
+
+    def __contains__(self, key: tuple):
+        return self._key(*key) in self._fonts
+
+    @staticmethod
+    def _key(path: str | None = None, size: int = 20, bold: bool = False, italic: bool = False) -> tuple:
+        if path is not None:
+            path = os.path.normpath(os.path.abspath(path))
+        return (path, int(size), bool(bold), bool(italic))
+
+    def get(self,
+            path: str | None = None,
+            size: int = 20,
+            bold: bool = False,
+            italic: bool = False) -> pygame.font.Font:
+        '''Shared font, loaded on first use
+
+        Parameters
+        ----------
+        path: `str` | `None`
+            Font file, None for pygame's default font
+        size: `int`
+            Font size
+        bold: `bool`
+            Bold style, drawn by pygame, for a bold font file pass its path instead
+        italic: `bool`
+            Italic style, drawn by pygame, for an italic font file pass its path instead
+        '''
+        key = self._key(path, size, bold, italic)
+        font = self._fonts.get(key)
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    if not pygame.font.get_init():
+                        pygame.font.init()
+                    font = pygame.font.Font(key[0], key[1])
+                    font.bold, font.italic = key[2], key[3]
+                    self._fonts[key] = font
+        return font
+
+    def preload(self, fonts: Iterable[tuple], background: bool = True) -> threading.Thread | None:
+        '''Load fonts ahead of their first use
+
+        Parameters
+        ----------
+        fonts
+            Tuples of `get` arguments: (path, size) or (path, size, bold, italic)
+        background: `bool`
+            Load them on a daemon thread and return it, or load them before returning
+        '''
+        fonts = list(fonts)
+        if not background:
+            for font in fonts:
+                self.get(*font)
+            return None
+        thread = threading.Thread(target=self.preload, args=(fonts, False), daemon=True)
+        thread.start()
+        return thread
+
+    def preload_theme(self, theme_path: str, background: bool = True) -> threading.Thread | None:
+        '''Preload the fonts of a pygame_gui theme file
+
+        Font blocks that only set some fields, like a size, take the others from the first block with a
+        `regular_path`. Relative paths are relative to the theme file'''
+        return self.preload(theme_fonts(theme_path), background)
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+
+
+def theme_fonts(theme_path: str) -> list[tuple]:
+    '''(path, size, bold, italic) of every font in a pygame_gui theme file'''
+    with open(theme_path) as file:
+        theme = json.load(file)
+    blocks = [element["font"] for element in theme.values() if isinstance(element, dict) and "font" in element]
+    base = next((block for block in blocks if "regular_path" in block), {})
+    theme_dir = os.path.dirname(os.path.abspath(theme_path))
+
+    fonts = []
+    for block in blocks:
+        block = {**base, **block}
+        path = block.get("regular_path")
+        if path is not None and not os.path.isabs(path):
+            path = os.path.join(theme_dir, path)
+        font = (path, int(block.get("size", 14)), str(block.get("bold", 0)) == "1", str(block.get("italic", 0)) == "1")
+        if font not in fonts:
+            fonts.append(font)
+    return fonts
+
+
+font_registry = FontRegistry()
+
+
+def default_font(size: int) -> pygame.font.Font:
+    '''pygame's default font at `size`, loaded on first use and shared by every widget after that
+
+    Widgets use it when no font is given, so importing pygame_input doesn't load fonts or need
+    pygame to be initialized first'''
+    return font_registry.get(None, size)
@@ -0,0 +1,235 @@
+import string
+from collections import OrderedDict
+
+import pygame
+
+from .textbuffer import char_advance, kerning
+
+# Printable ASCII, without the whitespace that isn't drawn
+DEFAULT_CHARSET = "".join(char for char in string.printable if char == " " or not char.isspace())
+DIGITS = "0123456789"
+
+# The digit advance is in 1/64 pixels, like in TextBuffer
+_SUBPIXELS = 64
+_HALF = _SUBPIXELS // 2
+# Width of the atlas, glyphs are packed in rows up to it
+_ATLAS_WIDTH = 1024
+_WHITE = (255, 255, 255, 255)
+_UNSEEN = object()
+
+
+# pygame-ce's fblits skips the per blit argument checks and return values of blits. Without it batching
+# glyph blits from Python is slower than rendering the string with the font, see benchmarks/text_bench.py
+_FBLITS = hasattr(pygame.Surface, "fblits")
+
+
+class GlyphAtlas:
+    '''
+        Text renderer drawing strings from glyphs rasterized once into a single atlas surface
+
+        Usage
+        ------------
+        Stands in for a `pygame.font.Font`: `render`, `size`, `get_height`, `get_linesize` and `metrics`
+        work the same, so it can be passed as the font of widgets. `draw` blits a string straight onto a
+        surface in one `Surface.fblits` batch, and no text surface, for counters, scores and labels redrawn
+        every frame. Glyphs are rasterized antialiased in white and tinted once per color. Strings are laid
+        out from the advances and kerning pairs TextBuffer uses, in one pass, when they are drawn a second
+        time, and the most recently used layouts are kept. Strings of digits are placed on the font's fixed digit advance instead when its
+        digits are tabular. Characters outside the charset are added to the atlas on first use.
+
+        The atlas is only faster than the font on pygame-ce and for short strings: on pygame, which has no
+        `fblits`, for strings longer than `max_length` and for strings not seen before, `draw`, `render`
+        and `size` use the font. benchmarks/text_bench.py compares both
+
+        Parameters
+        ----------
+        font: `pygame.font.Font`
+            Font the glyphs are rasterized from, e.g. `font_registry.get("fonts/ARIAL.TTF", 20)`
+        charset: `str`
+            Characters rasterized up front
+        max_colors: `int`
+            Colors the glyphs are kept tinted in, least recently used ones are dropped first
+        max_layouts: `int`
+            Strings seen and laid out kept, least recently used ones are dropped first
+        max_length: `int`
+            Longest string drawn from the atlas, longer ones are rendered by the font in one call
+    '''
+
+    def __init__(self,
+                 font: pygame.font.Font,
+                 charset: str = DEFAULT_CHARSET,
+                 max_colors: int = 16,
+                 max_layouts: int = 1024,
+                 max_length: int = 24) -> None:
+        self.font = font
+        self.max_colors = max_colors
+        self.max_layouts = max_layouts
+        self.max_length = max_length
+        self.atlas: pygame.Surface | None = None
+        self.height = 0
+        self._charset: set[str] = set()
+        self._rects: dict[str, pygame.Rect] = {}
+        # Advance of the left character of every pair seen, kerning included
+        self._pair_advances: dict[tuple[str, str], int] = {}
+        self._digit_advance: int | None = None
+        # None for strings seen once and not laid out yet
+        self._layouts: OrderedDict[str, tuple[list, int] | None] = OrderedDict()
+        self._tinted: OrderedDict[tuple, dict[str, pygame.Surface]] = OrderedDict()
+        self.add(charset)
+
+    # The style is the rasterized font's, TextCache and TextBuffer key on it
+    @property
+    def bold(self) -> bool:
+        return self.font.bold
+
+    @property
+    def italic(self) -> bool:
+        return self.font.italic
+
+    @property
+    def underline(self) -> bool:
+        return self.font.underline
+
+    def add(self, chars: str):
+        '''Rasterize `chars` into the atlas, the whole atlas is rebuilt if any of them is new'''
+        new = [char for char in dict.fromkeys(chars) if char not in self._charset]
+        if not new:
+            return
+        charset = [*self._rects, *new]
+        glyphs = [self.font.render(char, True, _WHITE) for char in charset]
+        # Rendered glyphs are all as tall as rendered text, which can be taller than `font.get_height`
+        height = max(glyph.get_height() for glyph in glyphs)
+
+        rects = []
+        x = y = 0
+        for glyph in glyphs:
+            if x + glyph.get_width() > _ATLAS_WIDTH and x:
+                x, y = 0, y + height
+            rects.append(pygame.Rect(x, y, glyph.get_width(), height))
+            x += glyph.get_width()
+        atlas = pygame.Surface((_ATLAS_WIDTH if y else max(x, 1), y + height), pygame.SRCALPHA)
+        # The atlas is transparent, copy the glyphs instead of blending them so their edges keep their color
+        atlas.blits([(glyph, rect, None, pygame.BLEND_RGBA_MAX) for glyph, rect in zip(glyphs, rects)], doreturn=False)
+
+        self.atlas = atlas
+        self.height = height
+        self._charset.update(new)
+        self._rects = dict(zip(charset, rects))
+        if DIGITS in self:
+            digit_advances = {char_advance(self.font, digit) for digit in DIGITS}
+            self._digit_advance = digit_advances.pop() if len(digit_advances) == 1 else None
+        self._tinted.clear()
+
+    def __contains__(self, chars: str):
+        return self._charset.issuperset(chars)
+
+    def _glyphs_for(self, color) -> dict[str, pygame.Surface]:
+        '''Glyphs of every character in `color`, cut from a tinted copy of the atlas'''
+        key = color if isinstance(color, tuple) else tuple(pygame.Color(color))
+        glyphs = self._tinted.get(key)
+        if glyphs is not None:
+            self._tinted.move_to_end(key)
+            return glyphs
+        atlas = self.atlas
+        if tuple(pygame.Color(color)) != _WHITE:
+            atlas = atlas.copy()
+            atlas.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+        # fblits only takes whole surfaces and blits them faster than sub-rects of the atlas
+        glyphs = self._tinted[key] = {char: atlas.subsurface(rect).copy() for char, rect in self._rects.items()}
+        if len(self._tinted) > self.max_colors:
+            self._tinted.popitem(last=False)
+        return glyphs
+
+    def _layout(self, text: str, remember: bool = True) -> tuple[list, int] | None:
+        '''(char, x) of every character of `text` and its width, None if `text` is left to the font
+
+        Laying a string out costs about as much as rendering it, so a string is only laid out when it comes
+        back, a string changing every frame is rendered by the font. With `remember` False, as when
+        measuring, the string isn't counted as seen'''
+        if not _FBLITS or len(text) > self.max_length:
+            return None
+        layouts = self._layouts
+        layout = layouts.get(text, _UNSEEN)
+        if layout is _UNSEEN:
+            if remember:
+                layouts[text] = None
+                if len(layouts) > self.max_layouts:
+                    layouts.popitem(last=False)
+            return None
+        layouts.move_to_end(text)
+        if layout is None and remember:
+            layout = layouts[text] = self._place(text)
+        return layout
+
+    def _place(self, text: str) -> tuple[list, int]:
+        if not text:
+            return [], 0
+        if not self._charset.issuperset(text):
+            self.add(text)
+        if self._digit_advance is not None and text.isascii() and text.isdigit():
+            # Tabular digits don't kern, counters and scores skip the kerning pairs
+            advance = self._digit_advance
+            offsets = [(char, (index * advance + _HALF) // _SUBPIXELS) for index, char in enumerate(text)]
+        else:
+            # Placed like TextBuffer places the caret, measuring prefixes with the font would be O(n²)
+            pair_advances = self._pair_advances
+            offsets = [(text[0], 0)]
+            pen = 0
+            for pair in zip(text, text[1:]):
+                advance = pair_advances.get(pair)
+                if advance is None:
+                    advance = pair_advances[pair] = char_advance(self.font, pair[0]) + kerning(self.font, *pair)
+                pen += advance
+                offsets.append((pair[1], (pen + _HALF) // _SUBPIXELS))
+        last_char, last_x = offsets[-1]
+        return offsets, last_x + self._rects[last_char].width
+
+    def size(self, text: str) -> tuple[int, int]:
+        '''Same as `font.size`, the height is the height of rendered text'''
+        layout = self._layout(text, remember=False)
+        if layout is None:
+            return self.font.size(text)
+        return layout[1], self.height
+
+    def render(self, text: str, antialias: bool, color, bgcolor=None) -> pygame.Surface:
+        '''Same as `font.render`, the glyphs are always antialiased'''
+        layout = self._layout(text)
+        if layout is None:
+            return self.font.render(text, antialias, color, bgcolor)
+        offsets, width = layout
+        glyphs = self._glyphs_for(color)
+        blits = [(glyphs[char], (x, 0)) for char, x in offsets]
+        surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        if bgcolor is not None:
+            surface.fill(bgcolor)
+            surface.fblits(blits)
+        else:
+            # Copied onto the transparent surface instead of blended, like in `add`
+            surface.fblits(blits, pygame.BLEND_RGBA_MAX)
+        return surface
+
+    def draw(self, surface: pygame.Surface, text: str, pos: tuple, color=(255, 255, 255)) -> pygame.Rect:
+        '''Draw `text` on `surface` with its top left corner at `pos`, returns the covered rect'''
+        layout = self._layout(text)
+        if layout is None:
+            return surface.blit(self.font.render(text, True, color), pos)
+        offsets, width = layout
+        x, y = pos
+        glyphs = self._glyphs_for(color)
+        surface.fblits([(glyphs[char], (x + dx, y)) for char, dx in offsets])
+        return pygame.Rect(x, y, width, self.height)
+
+    def metrics(self, text: str) -> list:
+        return self.font.metrics(text)
+
+    def get_height(self) -> int:
+        return self.font.get_height()
+
+    def get_linesize(self) -> int:
+        return self.font.get_linesize()
+
+    def get_ascent(self) -> int:
+        return self.font.get_ascent()
+
+    def get_descent(self) -> int:
+        return self.font.get_descent()
@@ -0,0 +1,143 @@
+import pygame
+
+_MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+_KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+
+
+class WidgetManager:
+    '''
+        Routes events to the widgets they concern instead of every widget handling every event
+
+        Usage
+        ------------
+        Replace the `handle_events` loops over every widget with one `handle_events` call. Mouse events are
+        only passed to the widgets under the cursor, found through a uniform grid over the widget
+        rects, plus the widgets that were hovered or are focused. Key events are only passed to the
+        focused widgets, or to the widgets listening for an activate key when nothing is focused.
+        Focused widgets are also called every frame with no events, for caret blinking and key repeat
+
+        Parameters
+        ----------
+        cell_size: `int`
+            Width and height of a grid cell in pixels
+        profiler
+            Optional `Profiler` from profiler.py, or anything with a `section(name)` context manager,
+            each widget's `handle_events` is timed under "ui.handle_events.<widget class>"
+    '''
+
+    def __init__(self, cell_size: int = 64, profiler=None) -> None:
+        self.cell_size = cell_size
+        self.profiler = profiler
+        self.widgets = []
+        self._order = {}
+        self._cells: dict[tuple[int, int], list] = {}
+        self._widget_cells = {}
+        self._hit_rects = {}
+        self._moved = set()
+        self._unobserved = []
+        self._hovered = set()
+        self._focused = set()
+
+    def add(self, *widgets):
+        '''Add widgets, they keep the order they are added in when handling events'''
+        for widget in widgets:
+            self._order[widget] = len(self.widgets)
+            self.widgets.append(widget)
+            if hasattr(widget, "_layout_attrs"):
+                widget._layout_listener = self._on_layout_change
+            else:
+                # Composite widgets like RadioInput can't report moves, they are reindexed every frame
+                self._unobserved.append(widget)
+            self._index(widget)
+
+    def remove(self, widget):
+        self.widgets.remove(widget)
+        self._order = {widget: index for index, widget in enumerate(self.widgets)}
+        self._unindex(widget)
+        self._hit_rects.pop(widget, None)
+        self._moved.discard(widget)
+        self._hovered.discard(widget)
+        self._focused.discard(widget)
+        if widget in self._unobserved:
+            self._unobserved.remove(widget)
+        if getattr(widget, "_layout_listener", None) == self._on_layout_change:
+            widget._layout_listener = None
+
+    def _on_layout_change(self, widget):
+        self._moved.add(widget)
+
+    @staticmethod
+    def _hit_rect(widget) -> pygame.Rect:
+        return widget.rect.union(widget.bounding_rect)
+
+    def _index(self, widget):
+        rect = self._hit_rect(widget)
+        if self._hit_rects.get(widget) == rect:
+            return
+        self._unindex(widget)
+        self._hit_rects[widget] = rect
+        size = self.cell_size
+        cells = [(column, row)
+                 for column in range(rect.left // size, (rect.right - 1) // size + 1)
+                 for row in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(widget)
+        self._widget_cells[widget] = cells
+
+    def _unindex(self, widget):
+        for cell in self._widget_cells.pop(widget, ()):
+            widgets = self._cells[cell]
+            widgets.remove(widget)
+            if not widgets:
+                del self._cells[cell]
+
+    def widgets_at(self, pos: tuple[int, int]) -> list:
+        '''Widgets whose area may contain `pos`'''
+        candidates = self._cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size), ())
+        return [widget for widget in candidates if self._hit_rects[widget].collidepoint(pos)]
+
+    def handle_events(self, events: list, dt: float):
+        '''Called at the start of every game loop
+
+        Parameters
+        ----------
+        events: `list`
+            Pass in the result from pygame.event.get(), be aware to only call this function once
+        dt: `float`
+            Time difference from last frame
+        '''
+        for widget in self._moved:
+            self._index(widget)
+        self._moved.clear()
+        for widget in self._unobserved:
+            self._index(widget)
+
+        routed: dict = {widget: [] for widget in self._focused}
+        for event in events:
+            if event.type in _MOUSE_EVENTS:
+                under_cursor = self.widgets_at(event.pos)
+                targets = set(under_cursor)
+                targets.update(self._focused)
+                if event.type == pygame.MOUSEMOTION:
+                    targets.update(self._hovered)
+                    self._hovered = set(under_cursor)
+            elif event.type in _KEY_EVENTS:
+                if self._focused:
+                    targets = self._focused
+                else:
+                    targets = [widget for widget in self.widgets if getattr(widget, "listens_to_keys", False)]
+            else:
+                continue
+            for widget in targets:
+                routed.setdefault(widget, []).append(event)
+
+        for widget in sorted(routed, key=self._order.__getitem__):
+            if self.profiler is None:
+                widget.handle_events(routed[widget], dt)
+            else:
+                with self.profiler.section("ui.handle_events." + type(widget).__name__):
+                    widget.handle_events(routed[widget], dt)
+            if getattr(widget, "focused", False):
+                self._focused.add(widget)
+            else:
+                self._focused.discard(widget)
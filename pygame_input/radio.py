@@ -4,10 +4,10 @@ import copy
 
 from pygame.surface import Surface, Surface as Surface
 from .toggle import ToggleButtonRect, ToggleButtonCircle
+from .cache import render_text
+from .fonts import default_font
 
-BASIC_RADIO_SELECTION_BUTTON = ToggleButtonCircle(
-    0, 0, 7, color=(255, 255, 255), outline_color=(
-        100, 100, 100), outline_width=2)
+_basic_radio_selection_button = None
 
 
 def _on_toggle_on(btn: ToggleButtonCircle):
@@ -18,7 +18,23 @@ def _on_toggle_off(btn: ToggleButtonCircle):
     btn.color = (255, 255, 255)
 
 
-BASIC_RADIO_SELECTION_BUTTON.set_on_toggle(_on_toggle_on, _on_toggle_off)
+def _get_basic_radio_selection_button() -> ToggleButtonCircle:
+    global _basic_radio_selection_button
+    if _basic_radio_selection_button is None:
+        button = ToggleButtonCircle(
+            0, 0, 7, color=(255, 255, 255), outline_color=(
+                100, 100, 100), outline_width=2)
+        button.set_on_toggle(_on_toggle_on, _on_toggle_off)
+        _basic_radio_selection_button = button
+    return _basic_radio_selection_button
+
+
+def __getattr__(name):
+    # BASIC_RADIO_SELECTION_BUTTON is built on first use instead of on import
+    if name == "BASIC_RADIO_SELECTION_BUTTON":
+        return _get_basic_radio_selection_button()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class RadioSelection:
     def __init__(self,
@@ -31,10 +47,9 @@ class RadioSelection:
                  text_color: tuple = (0,
                                       0,
                                       0),
-                 font: pygame.font.Font = pygame.font.Font(None,
-                                                           25),
+                 font: pygame.font.Font | None = None,
                  selected: bool = False,
-                 button: ToggleButtonRect | ToggleButtonCircle = BASIC_RADIO_SELECTION_BUTTON,
+                 button: ToggleButtonRect | ToggleButtonCircle | None = None,
                  active: bool = True,
                  x: int = 0,
                  y: int = 0) -> None:
@@ -43,20 +58,34 @@ class RadioSelection:
         self.text = text if text else str(value)
         self.text_position = text_position
         self.text_color = text_color
-        self.font = font
+        self.font = font if font else default_font(25)
         self.selected = selected
         self.x = x
         self.y = y
         self.text_x = x
         self.text_y = y
 
-        self.button = button
+        self.button = button if button else _get_basic_radio_selection_button()
         self.active = active
         self._container = None
+        self._drawn_text = None
+
+    @property
+    def rendered_text(self): return render_text(
+        self.font, self.text, True, self.text_color)
+
+    @property
+    def bounding_rect(self) -> pygame.Rect:
+        '''Screen area covered by `draw`'''
+        rect = self.button.bounding_rect
+        if self.text_position == "right":
+            return rect.union(self.rendered_text.get_rect(topleft=(self.x + self.button.width, self.y)))
+        return self.rendered_text.get_rect(topleft=(self.x, self.y))
 
     @property
-    def rendered_text(self): return self.font.render(
-        self.text, True, self.text_color)
+    def needs_redraw(self) -> bool:
+        '''Whether the selection looks different from the last time it was drawn'''
+        return self.button.needs_redraw or self.rendered_text is not self._drawn_text
 
     def set_position(self, x: int, y: int):
         self.x, self.y = x, y
@@ -95,7 +124,7 @@ class RadioSelection:
     def draw(self, screen: pygame.Surface):
         if not self.button:
             raise ValueError("Radio Selection Button Missing")
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = self._drawn_text = self.rendered_text
         if self.text_position == "right":
             self.button.draw(screen)
             screen.blit(text_surface, (self.x + self.button.width, self.y))
@@ -178,6 +207,18 @@ class RadioInput:
             for option in self.options:
                 option.handle_events(events, dt)
 
+    @property
+    def bounding_rect(self) -> pygame.Rect:
+        '''Screen area covered by `draw`'''
+        if not self.options:
+            return pygame.Rect(self.x, self.y, 0, 0)
+        return self.options[0].bounding_rect.unionall([option.bounding_rect for option in self.options[1:]])
+
+    @property
+    def needs_redraw(self) -> bool:
+        '''Whether any option looks different from the last time it was drawn'''
+        return any(option.needs_redraw for option in self.options)
+
     def draw(self, screen: pygame.Surface):
         for option in self.options:
             option.draw(screen)
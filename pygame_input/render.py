@@ -0,0 +1,132 @@
+import pygame
+
+
+def merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+    '''Union overlapping or touching rects until none overlap'''
+    merged = [pygame.Rect(rect) for rect in rects if rect.width > 0 and rect.height > 0]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for rect in merged:
+            for other in result:
+                if rect.inflate(1, 1).colliderect(other):
+                    other.union_ip(rect)
+                    changed = True
+                    break
+            else:
+                result.append(rect)
+        merged = result
+    return merged
+
+
+class RenderManager:
+    '''
+        Draws widgets and updates only the screen areas that changed
+
+        Usage
+        ------------
+        Replace the `screen.fill`, `widget.draw` calls and `pygame.display.flip` of the game loop with
+        `draw`, called once every frame. Widgets need `draw`, `bounding_rect` and `needs_redraw`, like
+        every widget in pygame_input. Call `invalidate` after drawing on the screen outside the manager
+
+        Parameters
+        ----------
+        screen: `pygame.Surface`
+            Display surface
+        background: `tuple` | `pygame.Surface`
+            Color or screen sized image drawn behind the widgets
+        full_update_ratio: `float`
+            Fraction of the screen area above which the whole display is flipped instead
+        profiler
+            Optional `Profiler` from profiler.py, or anything with a `section(name)` context manager,
+            each widget's `draw` is timed under "ui.draw.<widget class>"
+    '''
+
+    def __init__(self,
+                 screen: pygame.Surface,
+                 background: tuple | pygame.Surface = (0, 0, 0),
+                 full_update_ratio: float = 0.5,
+                 profiler=None) -> None:
+        self.screen = screen
+        self.background = background
+        self.full_update_ratio = full_update_ratio
+        self.profiler = profiler
+        self.widgets = []
+        self._drawn_rects = {}
+        self._invalid_rects: list[pygame.Rect] = []
+        self._full_redraw = True
+
+    def add(self, *widgets):
+        '''Add widgets, later ones are drawn on top'''
+        for widget in widgets:
+            self.widgets.append(widget)
+
+    def remove(self, widget):
+        self.widgets.remove(widget)
+        rect = self._drawn_rects.pop(widget, None)
+        if rect:
+            self._invalid_rects.append(rect)
+
+    def invalidate(self, rect: pygame.Rect | None = None):
+        '''Redraw `rect` on the next frame, or the whole screen if no rect is given'''
+        if rect is None:
+            self._full_redraw = True
+        else:
+            self._invalid_rects.append(pygame.Rect(rect))
+
+    def _fill_background(self, rect: pygame.Rect | None = None):
+        if isinstance(self.background, pygame.Surface):
+            if rect is None:
+                self.screen.blit(self.background, (0, 0))
+            else:
+                self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.fill(self.background, rect)
+
+    def _draw_widget(self, widget):
+        if self.profiler is None:
+            widget.draw(self.screen)
+        else:
+            with self.profiler.section("ui.draw." + type(widget).__name__):
+                widget.draw(self.screen)
+
+    def draw(self) -> list[pygame.Rect]:
+        '''Redraw what changed and update the display, returns the updated rects'''
+        dirty = self._invalid_rects
+        self._invalid_rects = []
+        drawn_rects = {}
+        for widget in self.widgets:
+            rect = widget.bounding_rect
+            last_rect = self._drawn_rects.get(widget)
+            if last_rect is None or rect != last_rect:
+                if last_rect:
+                    dirty.append(last_rect)
+                dirty.append(rect)
+            elif widget.needs_redraw:
+                dirty.append(rect)
+            drawn_rects[widget] = rect
+        self._drawn_rects = drawn_rects
+
+        screen_rect = self.screen.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in merge_rects(dirty)]
+        dirty_area = sum(rect.width * rect.height for rect in dirty)
+        if self._full_redraw or dirty_area > screen_rect.width * screen_rect.height * self.full_update_ratio:
+            self._full_redraw = False
+            self._fill_background()
+            for widget in self.widgets:
+                self._draw_widget(widget)
+            pygame.display.flip()
+            return [screen_rect]
+
+        if not dirty:
+            return []
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self._fill_background(rect)
+            for widget in self.widgets:
+                if drawn_rects[widget].colliderect(rect):
+                    self._draw_widget(widget)
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
+        return dirty
@@ -0,0 +1,74 @@
+import pygame
+
+_MISSING = object()
+
+
+class Retained:
+    '''
+        Base for widgets that keep their composed appearance on an off-screen surface
+
+        Usage
+        ------------
+        Subclasses list the attributes that change how they look in `_appearance_attrs` and build the
+        surface in `_compose`. Assigning a different value to one of those attributes marks the surface
+        dirty, so `composed_surface` is only rebuilt when something visible changed. Call `mark_dirty`
+        after changing an attribute in place, e.g. a font's bold flag
+
+        Attributes in `_layout_attrs` move or resize the widget, changing them drops the cached `rect`
+        and tells the `WidgetManager` the widget is in, if any
+    '''
+
+    _appearance_attrs: frozenset = frozenset()
+    _layout_attrs: frozenset = frozenset(("x", "y", "width", "height"))
+
+    def __setattr__(self, name, value):
+        appearance = name in self._appearance_attrs
+        layout = name in self._layout_attrs
+        if appearance or layout:
+            old = self.__dict__.get(name, _MISSING)
+            if old is not value and old != value:
+                if appearance:
+                    self.__dict__["_dirty"] = True
+                if layout:
+                    self.__dict__.pop("_rect", None)
+                    listener = self.__dict__.get("_layout_listener")
+                    if listener:
+                        listener(self)
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # Copies rebuild their own surface, surfaces can't be copied with copy.deepcopy,
+        # and they don't belong to the original's manager
+        state = self.__dict__.copy()
+        state.pop("_composed", None)
+        state.pop("_layout_listener", None)
+        state["_dirty"] = True
+        return state
+
+    @property
+    def rect(self) -> pygame.Rect:
+        '''Hit area of the widget, cached until it moves or resizes, must not be modified'''
+        rect = self.__dict__.get("_rect")
+        if rect is None:
+            rect = self.__dict__["_rect"] = pygame.Rect(self.x, self.y, self.width, self.height)
+        return rect
+
+    def mark_dirty(self):
+        '''Rebuild the composed surface on the next draw'''
+        self.__dict__["_dirty"] = True
+
+    @property
+    def needs_redraw(self) -> bool:
+        '''Whether the widget looks different from the last time it was drawn'''
+        return self.__dict__.get("_dirty", True) or self.__dict__.get("_composed") is None
+
+    @property
+    def composed_surface(self) -> pygame.Surface:
+        '''The widget's appearance, rebuilt only when dirty'''
+        if self.__dict__.get("_dirty", True) or self.__dict__.get("_composed") is None:
+            self.__dict__["_composed"] = self._compose()
+            self.__dict__["_dirty"] = False
+        return self.__dict__["_composed"]
+
+    def _compose(self) -> pygame.Surface:
+        raise NotImplementedError
@@ -0,0 +1,238 @@
+from bisect import bisect_left, bisect_right
+
+import pygame
+
+# Advances are kept in 1/64 pixels like FreeType does, so sums of them never drift
+_SUBPIXELS = 64
+# Characters repeated this many times to measure their advance to a subpixel
+_RUN = 9
+
+_advances: dict[tuple, dict[str, int]] = {}
+_kernings: dict[tuple, dict[tuple[str, str], int]] = {}
+
+
+def _style(font: pygame.font.Font) -> tuple:
+    return (font, font.bold, font.italic)
+
+
+def char_advance(font: pygame.font.Font, char: str) -> int:
+    '''Horizontal advance of `char` in 1/64 pixels, measured once per font and style
+
+    `font.metrics` gives hinted whole pixel advances which drift from how `font.size` and `font.render`
+    lay text out, so the advance is measured over a run of the character instead
+    '''
+    advances = _advances.setdefault(_style(font), {})
+    advance = advances.get(char)
+    if advance is None:
+        run_width = font.size(char * _RUN)[0] - font.size(char)[0]
+        advance = advances[char] = round(run_width * _SUBPIXELS / (_RUN - 1))
+    return advance
+
+
+def kerning(font: pygame.font.Font, left: str, right: str) -> int:
+    '''Adjustment of the advance of `left` when followed by `right`, in 1/64 pixels'''
+    kernings = _kernings.setdefault(_style(font), {})
+    pair = (left, right)
+    adjustment = kernings.get(pair)
+    if adjustment is None:
+        pair_width = (font.size(left + right)[0] - font.size(right)[0]) * _SUBPIXELS
+        adjustment = pair_width - char_advance(font, left)
+        # Differences under a pixel are rounding, not kerning
+        if abs(adjustment) < _SUBPIXELS:
+            adjustment = 0
+        kernings[pair] = adjustment
+    return adjustment
+
+
+class TextBuffer:
+    '''
+        Editable text with a cursor, stored as a gap buffer with cached character advances
+
+        Usage
+        ------------
+        Edits at the cursor and cursor moves by one are O(1) amortized. Running sums of the advances are
+        kept on both sides of the gap, so `x_of` and `width` give caret and scroll positions without
+        rendering or measuring the text again
+
+        Parameters
+        ----------
+        font: `pygame.font.Font`
+            Font the text is laid out with
+        text: `str`
+            Initial text, the cursor starts at its end
+    '''
+
+    def __init__(self, font: pygame.font.Font, text: str = "") -> None:
+        self.font = font
+        self._style = _style(font)
+        # Characters before the cursor in order, and after the cursor in reverse, the gap is between them.
+        # _left_x[i] is the advance of the first i characters, with the kerning between them,
+        # _right_x[i] the advance of the last i characters, with the kerning between them
+        self._left: list[str] = []
+        self._right: list[str] = []
+        self._left_x: list[int] = [0]
+        self._right_x: list[int] = [0]
+        self._text: str | None = ""
+        # Counts edits, so callers can tell the text changed without comparing it
+        self.version = 0
+        self.insert(text)
+
+    def __len__(self):
+        return len(self._left) + len(self._right)
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._left) + "".join(reversed(self._right))
+        return self._text
+
+    def slice(self, start: int, end: int) -> str:
+        '''`text[start:end]`, joined from the buffer without building the whole text'''
+        if self._text is not None:
+            return self._text[start:end]
+        length = len(self)
+        start, end, _ = slice(start, end).indices(length)
+        if start >= end:
+            return ""
+        cursor = len(self._left)
+        left = "".join(self._left[start:min(end, cursor)]) if start < cursor else ""
+        right = ""
+        if end > cursor:
+            # Index i right of the gap is _right[length - 1 - i]
+            right = "".join(reversed(self._right[length - end:length - max(start, cursor)]))
+        return left + right
+
+    @property
+    def cursor(self) -> int:
+        return len(self._left)
+
+    def _push_left(self, char: str):
+        advance = char_advance(self.font, char)
+        if self._left:
+            advance += kerning(self.font, self._left[-1], char)
+        self._left.append(char)
+        self._left_x.append(self._left_x[-1] + advance)
+
+    def _push_right(self, char: str):
+        advance = char_advance(self.font, char)
+        if self._right:
+            advance += kerning(self.font, char, self._right[-1])
+        self._right.append(char)
+        self._right_x.append(self._right_x[-1] + advance)
+
+    def _pop_left(self) -> str:
+        self._left_x.pop()
+        return self._left.pop()
+
+    def _pop_right(self) -> str:
+        self._right_x.pop()
+        return self._right.pop()
+
+    def move_to(self, index: int):
+        '''Move the cursor to `index`, clamped to the text'''
+        index = max(0, min(index, len(self)))
+        while len(self._left) > index:
+            self._push_right(self._pop_left())
+        while len(self._left) < index:
+            self._push_left(self._pop_right())
+
+    def insert(self, text: str):
+        '''Insert `text` at the cursor and move the cursor after it'''
+        if not text:
+            return
+        self._text = None
+        self.version += 1
+        for char in text:
+            self._push_left(char)
+
+    def delete_before(self, count: int = 1) -> str:
+        '''Remove up to `count` characters before the cursor, like backspace, returns them'''
+        count = min(count, len(self._left))
+        if count <= 0:
+            return ""
+        self._text = None
+        self.version += 1
+        return "".join(reversed([self._pop_left() for _ in range(count)]))
+
+    def delete_after(self, count: int = 1) -> str:
+        '''Remove up to `count` characters after the cursor, like delete, returns them'''
+        count = min(count, len(self._right))
+        if count <= 0:
+            return ""
+        self._text = None
+        self.version += 1
+        return "".join([self._pop_right() for _ in range(count)])
+
+    def set_text(self, text: str):
+        '''Replace the whole text, the cursor stays at its index if it still fits'''
+        cursor = self.cursor
+        self._left, self._right = [], []
+        self._left_x, self._right_x = [0], [0]
+        self._text = None
+        self.version += 1
+        self.insert(text)
+        self.move_to(cursor)
+
+    def set_font(self, font: pygame.font.Font):
+        '''Lay the text out with another font, all advances are measured again'''
+        self.font = font
+        self._style = _style(font)
+        self.set_text(self.text)
+
+    def _check_style(self):
+        if self._style != _style(self.font):
+            # Bold or italic was toggled on the font in place
+            self.set_font(self.font)
+
+    def _gap_kerning(self) -> int:
+        if self._left and self._right:
+            return kerning(self.font, self._left[-1], self._right[-1])
+        return 0
+
+    def _x(self, index: int) -> int:
+        cursor = len(self._left)
+        if index <= cursor:
+            x = self._left_x[index]
+            # The kerning with the character at index moves it, but is only counted once both are left of the gap
+            if 0 < index < cursor:
+                x += kerning(self.font, self._left[index - 1], self._left[index])
+            elif 0 < index == cursor:
+                x += self._gap_kerning()
+            return x
+        return self._total() - self._right_x[len(self) - index]
+
+    def _total(self) -> int:
+        return self._left_x[-1] + self._gap_kerning() + self._right_x[-1]
+
+    def x_of(self, index: int) -> int:
+        '''Pixel offset of the character at `index` from the start of the text'''
+        self._check_style()
+        index = max(0, min(index, len(self)))
+        return round(self._x(index) / _SUBPIXELS)
+
+    @property
+    def width(self) -> int:
+        '''Advance width of the whole text in pixels'''
+        self._check_style()
+        return round(self._total() / _SUBPIXELS)
+
+    def index_at(self, x: float) -> int:
+        '''Index of the last character whose `x_of` is at or left of pixel offset `x`'''
+        self._check_style()
+        # x_of rounds to whole pixels, a subpixel position is at or left of x when it is left of x + 0.5
+        x = (x + 0.5) * _SUBPIXELS
+        cursor = len(self._left)
+        if self._x(cursor) >= x:
+            index = max(bisect_left(self._left_x, x) - 1, 0)
+            # Kerning can move a character across x
+            while index > 0 and self._x(index) >= x:
+                index -= 1
+            while index + 1 < cursor and self._x(index + 1) < x:
+                index += 1
+            return index
+        # Right of the gap, index i starts at total - _right_x[len - i]
+        index = len(self) - bisect_right(self._right_x, self._total() - x)
+        return max(index, cursor)
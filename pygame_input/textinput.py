@@ -1,7 +1,11 @@
 import pygame
+from .cache import render_shape, render_text, scale_image
+from .fonts import default_font
+from .retained import Retained
+from .textbuffer import TextBuffer
 
 
-class TextInput:
+class TextInput(Retained):
     '''
         Text box input for pygame
 
@@ -10,6 +14,12 @@ class TextInput:
         `handle_event` and `draw` must be called every frame, `set_on_submit` can be used to do different actions
     '''
 
+    _appearance_attrs = frozenset((
+        "width", "height", "border_radius", "border_top_left_radius", "border_top_right_radius",
+        "border_bottom_left_radius", "border_bottom_right_radius", "background_image", "smooth_scale",
+        "background_color", "outline_color", "outline_width", "padding", "text_surface", "_text_x", "_pointer_x"))
+    _layout_attrs = frozenset(("x", "y", "width", "height", "outline_width"))
+
     def __init__(self,
                  x: int,
                  y: int,
@@ -18,7 +28,7 @@ class TextInput:
                  border_radius: int = 0,
                  text: str = "",
                  placeholder: str = "",
-                 font: pygame.font.Font = pygame.font.Font(None, 10),
+                 font: pygame.font.Font | None = None,
                  background_image: pygame.Surface | None = None,
                  background_color: tuple = (255, 255, 255),
                  outline_color: tuple = (0, 0, 0),
@@ -35,13 +45,14 @@ class TextInput:
         self.border_top_right_radius = border_radius
         self.border_bottom_left_radius = border_radius
         self.border_bottom_right_radius = border_radius
-        self.text = text
+        font = font if font else default_font(10)
+        self._buffer = TextBuffer(font, text)
         self.pointer = 0
         self._position_shift = 0
-        self.placeholder = placeholder
-        self.font = font
-        self.background_image = pygame.transform.scale(
-            background_image, (width, height)) if background_image else None
+        self._placeholder = placeholder
+        # Kept unscaled, scaled copies for every size come from the shared scale cache
+        self.background_image = background_image
+        self.smooth_scale = False
         self.background_color = background_color
         self.active_background_color = background_color
         self.inactive_background_color = background_color
@@ -49,9 +60,15 @@ class TextInput:
         self.outline_color = outline_color
         self.outline_width = outline_width
         self.padding = padding
-        self.text_color = text_color
+        self._text_color = text_color
 
-        self.text_surface = font.render(self.text, True, text_color)
+        self.text_surface = None
+        self._text_x = 0
+        self._visible_first = 0
+        self._visible_text = ""
+        self._pointer_x = None
+        self._display_surface = None
+        self._surface = None
 
         self.active = False
         self._activate_mouse_button = None
@@ -69,14 +86,82 @@ class TextInput:
         self._pressing_down_time = 0
         self._pointer_animation_clock = 0
         self._pointer_animation_showing = True
+        self._active_text_key = None
 
         if height <= padding * 2 or width <= padding * 2:
             raise ValueError(
                 "Height and Width must be bigger than 2 times of padding")
+        self._render_visible_text()
+
+    # Changes to what is shown re-render the text surface right away, a WidgetManager only calls
+    # handle_events of focused widgets and widgets that get events, so it can't be left to that
+    @property
+    def text(self) -> str:
+        return self._buffer.text
+
+    @text.setter
+    def text(self, text: str):
+        self._buffer.set_text(text)
+        if not self.active:
+            self._position_shift = 0
+        self._render_visible_text()
+
+    @property
+    def pointer(self) -> int:
+        '''Index of the caret in `text`'''
+        return self._buffer.cursor
+
+    @pointer.setter
+    def pointer(self, index: int):
+        self._buffer.move_to(index)
+
+    @property
+    def font(self) -> pygame.font.Font:
+        return self._buffer.font
+
+    @font.setter
+    def font(self, font: pygame.font.Font):
+        self._buffer.set_font(font)
+        self._render_visible_text()
+
+    @property
+    def text_color(self) -> tuple:
+        return self._text_color
+
+    @text_color.setter
+    def text_color(self, color: tuple):
+        self._text_color = color
+        self._render_visible_text()
+        # The caret is drawn in the text color
+        self.mark_dirty()
+
+    @property
+    def placeholder(self) -> str:
+        return self._placeholder
+
+    @placeholder.setter
+    def placeholder(self, placeholder: str):
+        self._placeholder = placeholder
+        self._render_visible_text()
+
+    @property
+    def focused(self) -> bool:
+        '''Whether the text box takes keyboard input'''
+        return self.active
+
+    @property
+    def listens_to_keys(self) -> bool:
+        '''Whether the text box needs key presses while not focused'''
+        return self._activate_key is not None
 
     @property
-    def rect(self) -> pygame.Rect:
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+    def bounding_rect(self) -> pygame.Rect:
+        '''Screen area covered by `draw`, including the outline'''
+        return pygame.Rect(
+            self.x - self.outline_width,
+            self.y - self.outline_width,
+            self.width + self.outline_width * 2,
+            self.height + self.outline_width * 2)
 
     def handle_events(self, events: list, dt: float) -> bool:
         '''Called at the start of every game loop
@@ -126,19 +211,15 @@ class TextInput:
                     elif event.key == pygame.K_BACKSPACE:
                         if self.pointer == 0:
                             continue
-                        self.text = self.text[0:self.pointer -
-                                              1] + self.text[self.pointer:]
-                        self.pointer -= 1
+                        self._buffer.delete_before()
                     elif event.key == pygame.K_LEFT:
                         if self.pointer > 0:
                             self.pointer -= 1
                     elif event.key == pygame.K_RIGHT:
-                        if self.pointer < len(self.text):
+                        if self.pointer < len(self._buffer):
                             self.pointer += 1
                     else:
-                        self.text = self.text[0:self.pointer] + \
-                            event.unicode + self.text[self.pointer:]
-                        self.pointer += 1
+                        self._buffer.insert(event.unicode)
 
                     self._pressing_down = event
                     self._pressing_down_time = 0
@@ -151,19 +232,15 @@ class TextInput:
         # Key hold down actions
         if self._pressing_down_time > 0.5 and self._pressing_down:
             if self._pressing_down.key == pygame.K_BACKSPACE:
-                if self.pointer > 0:
-                    self.text = self.text[0:self.pointer -
-                                          1] + self.text[self.pointer:]
-                    self.pointer -= 1
+                self._buffer.delete_before()
             elif self._pressing_down.key == pygame.K_LEFT:
                 if self.pointer > 0:
                     self.pointer -= 1
             elif self._pressing_down.key == pygame.K_RIGHT:
-                if self.pointer < len(self.text):
+                if self.pointer < len(self._buffer):
                     self.pointer += 1
             else:
-                self.text += self._pressing_down.unicode
-                self.pointer += 1
+                self._buffer.insert(self._pressing_down.unicode)
             self._pressing_down_time -= 0.05
             self._pointer_animation_clock = 0
             self._pointer_animation_showing = True
@@ -171,67 +248,81 @@ class TextInput:
         if self._pressing_down:
             self._pressing_down_time += dt
 
-        # display surface creating
+        # display text updating, only when something shown in it changed
         if self.active:
-            text_render = self.font.render(self.text, True, self.text_color)
-
-            text_surface_width = text_render.get_width()
-            text_width_right_of_pointer = self.font.render(
-                self.text[self.pointer:], True, self.text_color).get_width()
-            pointer_loc = text_surface_width - text_width_right_of_pointer
-            pointer_surface = pygame.Surface(
-                (self.font.get_height() // 10, self.font.get_height()))
-            if self._pointer_animation_showing:
-                pointer_surface.fill(self.text_color)
-            else:
-                pointer_surface.fill(self.background_color)
-
-            pointer_display_pos_right = pointer_loc - \
-                self._position_shift + pointer_surface.get_width()
-            text_display_width = self.width - self.padding * 2      # (*****)|
-            # |(*****)
-            pointer_is_right_of_display = pointer_display_pos_right > text_display_width
-            pointer_is_left_of_display = pointer_loc < self._position_shift and text_width_right_of_pointer > self.width
-            text_width_is_shorter_than_display = pointer_display_pos_right + \
-                text_width_right_of_pointer < text_display_width  # *(****|)
-
-            if pointer_is_right_of_display:
-                self._position_shift = pointer_loc + pointer_surface.get_width() - self.width + \
-                    self.padding * 2
-
-            elif pointer_is_left_of_display:
-                self._position_shift = pointer_loc
-
-            elif text_width_is_shorter_than_display:
-                pointer_abs_pos_right = pointer_loc + pointer_surface.get_width()
-                new_pos_shift = pointer_abs_pos_right + \
-                    text_width_right_of_pointer - text_display_width
-                self._position_shift = 0 if new_pos_shift < 0 else new_pos_shift
-
-            self.text_surface = pygame.Surface(
-                (text_render.get_width() +
-                 pointer_surface.get_width(),
-                 text_render.get_height()),
-                pygame.SRCALPHA,
-                32)
-            self.text_surface.convert_alpha()
-            self.text_surface.blit(
-                pointer_surface, (pointer_loc - pointer_surface.get_width() * 0.5, 0))
-            self.text_surface.blit(text_render, (0, 0))
-
-        elif self.text:
-            self.text_surface = self.font.render(
-                self.text, True, self.text_color)
+            # The buffer's edit counter stands for the text, building and comparing the text is O(n)
+            active_text_key = (self._buffer.version, self.pointer, self._pointer_animation_showing, self._position_shift,
+                               self.font, self.text_color, self.background_color, self.width, self.padding)
+            if active_text_key != self._active_text_key:
+                self._active_text_key = active_text_key
+
+                pointer_width = self.font.get_height() // 10
+                text_display_width = self.width - self.padding * 2      # (*****)|
+                # Positions are measured on the rendered visible text, which is at most a text box wide, so
+                # the caret sits where the font put the glyphs. Positions outside it come from the buffer's
+                # cached advances, which drift by a few pixels, and are measured again once scrolled into view
+                self._render_visible_text()
+                for _ in range(2):
+                    pointer_x = self._visible_x(self.pointer)
+                    text_end_x = self._visible_x(len(self._buffer))
+                    text_width_right_of_pointer = text_end_x - pointer_x
+
+                    # |(*****)
+                    pointer_is_right_of_display = pointer_x + pointer_width > text_display_width
+                    pointer_is_left_of_display = pointer_x < 0 and text_width_right_of_pointer > self.width
+                    text_width_is_shorter_than_display = text_end_x + pointer_width < text_display_width  # *(****|)
+
+                    position_shift = self._position_shift
+                    if pointer_is_right_of_display:
+                        position_shift += pointer_x + pointer_width - text_display_width
+
+                    elif pointer_is_left_of_display:
+                        position_shift += pointer_x
+
+                    elif text_width_is_shorter_than_display:
+                        new_pos_shift = position_shift + text_end_x + pointer_width - text_display_width
+                        position_shift = 0 if new_pos_shift < 0 else new_pos_shift
+
+                    if position_shift == self._position_shift:
+                        break
+                    self._position_shift = position_shift
+                    self._render_visible_text()
+                else:
+                    pointer_x = self._visible_x(self.pointer)
+                self._pointer_x = pointer_x if self._pointer_animation_showing else None
 
         else:
-            self.text_surface = self.font.render(
-                self.placeholder, True, (100, 100, 100, 100))
+            self._active_text_key = None
+            self._pointer_x = None
+            self._render_visible_text()
 
         self._pointer_animation_clock += dt
         if self._pointer_animation_clock >= 0.5:
             self._pointer_animation_clock -= 0.5
             self._pointer_animation_showing = not self._pointer_animation_showing
 
+    def _render_visible_text(self):
+        '''Render only the characters inside the text box, so the cost doesn't grow with the text'''
+        if len(self._buffer) or self.active:
+            first = self._buffer.index_at(self._position_shift)
+            last = self._buffer.index_at(self._position_shift + self.width - self.padding * 2) + 1
+            self._visible_first = first
+            self._visible_text = self._buffer.slice(first, last)
+            self.text_surface = render_text(self.font, self._visible_text, True, self.text_color)
+            self._text_x = self._buffer.x_of(first) - self._position_shift
+        else:
+            self.text_surface = render_text(self.font, self.placeholder, True, (100, 100, 100, 100))
+            self._text_x = -self._position_shift
+
+    def _visible_x(self, index: int) -> int:
+        '''x of the caret before character `index` in the text box'''
+        first = self._visible_first
+        if not first <= index <= first + len(self._visible_text):
+            return self._buffer.x_of(index) - self._position_shift
+        # Measured from the end like the font lays out the rendered text, kerning included
+        right_of_index = self._visible_text[index - first:]
+        return self._text_x + self.font.size(self._visible_text)[0] - self.font.size(right_of_index)[0]
+
     def set_advanced_border_radius(
             self,
             border_top_left_radius: int,
@@ -243,9 +334,18 @@ class TextInput:
         self.border_bottom_left_radius = border_bottom_left_radius
         self.border_bottom_right_radius = border_bottom_right_radius
 
-    def set_background_image(self, image: pygame.Surface):
-        self.background_image = pygame.transform.scale(
-            image, (self.width, self.height))
+    def set_background_image(self, image: pygame.Surface, smooth: bool = False):
+        '''Set the image drawn inside the outline, scaled to the text box's size
+
+        Parameters
+        ----------
+        image: `pygame.Surface`
+            The image, kept as it is and must not be modified afterwards
+        smooth: `bool`
+            Scale it with `pygame.transform.smoothscale`
+        '''
+        self.background_image = image
+        self.smooth_scale = smooth
 
     def set_active_background_color(self, color: tuple):
         self.active_background_color = color
@@ -357,43 +457,67 @@ class TextInput:
             self._on_inactive_action(self)
         self.active = False
 
-    def draw(self, screen: pygame.Surface):
-        pygame.draw.rect(
-            screen,
+    def _compose(self) -> pygame.Surface:
+        shape = render_shape(
+            (self.width, self.height),
+            (self.border_radius,
+             self.border_top_left_radius,
+             self.border_top_right_radius,
+             self.border_bottom_left_radius,
+             self.border_bottom_right_radius),
+            self.outline_width,
             self.outline_color,
-            (self.x - self.outline_width,
-             self.y - self.outline_width,
-             self.width + self.outline_width * 2,
-             self.height + self.outline_width * 2),
-            border_radius=self.border_radius,
-            border_top_left_radius=self.border_top_left_radius,
-            border_top_right_radius=self.border_top_right_radius,
-            border_bottom_left_radius=self.border_bottom_left_radius,
-            border_bottom_right_radius=self.border_bottom_right_radius)
+            None if self.background_image else self.background_color)
+        surface = self._get_surface(shape)
+        inner_rect = pygame.Rect(
+            self.outline_width, self.outline_width, self.width, self.height)
         if self.background_image:
-            screen.blit(self.background_image, (self.x, self.y))
-            display_surface = pygame.Surface(
-                (self.width - self.padding * 2,
-                 self.height - self.padding * 2), pygame.SRCALPHA, 32)
-            display_surface = display_surface.convert_alpha()
+            surface.blit(
+                scale_image(self.background_image, (self.width, self.height), self.smooth_scale),
+                inner_rect)
+        display_surface = self._get_display_surface()
+        if self._pointer_x is not None:
+            pointer_width = self.font.get_height() // 10
+            display_surface.fill(
+                self.text_color,
+                (self._pointer_x - pointer_width // 2, 0, pointer_width, self.font.get_height()))
+        display_surface.blit(self.text_surface, (self._text_x, 0))
+        surface.blit(
+            display_surface,
+            (inner_rect.x + self.padding,
+             inner_rect.y + self.padding))
+        return surface
+
+    def _get_surface(self, shape: pygame.Surface) -> pygame.Surface:
+        '''The surface the text box is composed on, reset to `shape` and kept between composes while the size stays the same'''
+        surface = self._surface
+        if surface is None or surface.get_size() != shape.get_size():
+            surface = self._surface = pygame.Surface(shape.get_size(), pygame.SRCALPHA, 32)
+        surface.fill((0, 0, 0, 0))
+        # Copied instead of blended, like `shape.copy()`, so the transparent corners stay transparent
+        surface.blit(shape, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        return surface
+
+    def _get_display_surface(self) -> pygame.Surface:
+        '''The cleared surface the text is drawn on, kept between composes while the size stays the same'''
+        size = (self.width - self.padding * 2, self.height - self.padding * 2)
+        transparent = self.background_image is not None
+        display_surface = self._display_surface
+        if (display_surface is None or display_surface.get_size() != size
+                or bool(display_surface.get_flags() & pygame.SRCALPHA) != transparent):
+            if transparent:
+                display_surface = pygame.Surface(size, pygame.SRCALPHA, 32)
+            else:
+                display_surface = pygame.Surface(size)
+            self._display_surface = display_surface
+        if transparent:
+            display_surface.fill((0, 0, 0, 0))
         else:
-            pygame.draw.rect(
-                screen,
-                self.background_color,
-                self.rect,
-                border_radius=self.border_radius,
-                border_top_left_radius=self.border_top_left_radius,
-                border_top_right_radius=self.border_top_right_radius,
-                border_bottom_left_radius=self.border_bottom_left_radius,
-                border_bottom_right_radius=self.border_bottom_right_radius)
-            display_surface = pygame.Surface(
-                (self.width - self.padding * 2,
-                 self.height - self.padding * 2))
             display_surface.fill(self.background_color)
-        display_surface.blit(self.text_surface, (-self._position_shift, 0))
+        return display_surface
+
+    def draw(self, screen: pygame.Surface):
         screen.blit(
-            display_surface,
-            (self.x +
-             self.padding,
-             self.y +
-             self.padding))
+            self.composed_surface,
+            (self.x - self.outline_width,
+             self.y - self.outline_width))
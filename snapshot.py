@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from typing import Callable
+
+from network import Network, LOGIN_RESULT, SNAPSHOT, SNAPSHOT_DELTA, SNAPSHOT_ACK, SNAPSHOT_REQUEST
+
+
+class SnapshotReceiver:
+    '''
+        Rebuilds world snapshots from full snapshots and deltas sent by the server
+
+        Usage
+        ------------
+        Every applied snapshot is acknowledged so the server can delta against it. When a delta refers
+        to a baseline this client no longer has, or after a login/reconnect, a full snapshot is requested.
+        Entity dicts are shared between snapshots and must not be modified
+
+        Parameters
+        ----------
+        network: `Network`
+            Network to receive snapshots from, handlers run in `Network.dispatch`
+        history: `int`
+            Number of acknowledged snapshots kept as possible baselines
+    '''
+
+    def __init__(self, network: Network, history: int = 32) -> None:
+        self.network = network
+        self.history = history
+        self.tick: int | None = None
+        self.server_time: float | None = None
+        self.entities: dict[int, dict] = {}
+
+        self._baselines: OrderedDict[int, dict[int, dict]] = OrderedDict()
+        self._awaiting_full = False
+        self._on_snapshot = None
+
+        network.on(SNAPSHOT, self._on_full_snapshot)
+        network.on(SNAPSHOT_DELTA, self._on_delta_snapshot)
+        network.on(LOGIN_RESULT, self._on_login_result)
+
+    def set_on_snapshot(self, func: Callable):
+        '''Set action when a new snapshot is applied
+
+        Parameters
+        ----------
+        func
+            Function to be called, take in 1 argument: self
+        '''
+        self._on_snapshot = func
+
+    def reset(self):
+        '''Forget every baseline and ask the server for a full snapshot'''
+        self._baselines.clear()
+        self.tick = None
+        self.request_full_snapshot()
+
+    def request_full_snapshot(self):
+        if self._awaiting_full:
+            return
+        self._awaiting_full = True
+        self.network.post({"type": SNAPSHOT_REQUEST})
+
+    def _on_login_result(self, message: dict):
+        if not message["failed"]:
+            self._awaiting_full = False
+            self.reset()
+
+    def _on_full_snapshot(self, message: dict):
+        if self.tick is not None and message["tick"] <= self.tick:
+            return
+        self._awaiting_full = False
+        self._apply(message["tick"], message["server_time"],
+                    {entity["id"]: entity for entity in message["entities"]})
+
+    def _on_delta_snapshot(self, message: dict):
+        if self.tick is not None and message["tick"] <= self.tick:
+            return
+        baseline = self._baselines.get(message["baseline"])
+        if baseline is None:
+            self.request_full_snapshot()
+            return
+        entities = dict(baseline)
+        for change in message["entities"]:
+            entity = entities.get(change["id"])
+            entities[change["id"]] = {**entity, **change} if entity else change
+        for entity_id in message["removed"]:
+            entities.pop(entity_id, None)
+        self._apply(message["tick"], message["server_time"], entities)
+
+    def _apply(self, tick: int, server_time: float, entities: dict[int, dict]):
+        self.tick = tick
+        self.server_time = server_time
+        self.entities = entities
+        self._baselines[tick] = entities
+        while len(self._baselines) > self.history:
+            self._baselines.popitem(last=False)
+        self.network.post({"type": SNAPSHOT_ACK, "tick": tick})
+        if self._on_snapshot:
+            self._on_snapshot(self)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test are top-level files of the repository, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeNetwork:
+    '''Records posted messages and lets tests call the registered handlers, like `Network.dispatch` would'''
+
+    def __init__(self) -> None:
+        self.posted = []
+        self.handlers = {}
+
+    def on(self, msg_type, func):
+        self.handlers.setdefault(msg_type, []).append(func)
+
+    def post(self, message):
+        self.posted.append(message)
+
+    def receive(self, msg_type, message):
+        for handler in self.handlers.get(msg_type, []):
+            handler(message)
+
+
+@pytest.fixture
+def network():
+    return FakeNetwork()
@@ -0,0 +1,29 @@
+import pygame
+
+from pygame_input import ButtonRect
+
+GREEN = (0, 255, 0)
+
+
+def label_button(text):
+    pygame.font.init()
+    button = ButtonRect(10, 10, 50, 50, 2, outline_width=3, outline_color=(255, 0, 0))
+    button.set_label(text, pygame.font.Font(None, 30), GREEN)
+    return button
+
+
+def green_columns(surface):
+    return {x for x in range(surface.get_width()) for y in range(surface.get_height())
+            if surface.get_at((x, y))[:3] == GREEN}
+
+
+def test_label_wider_than_the_button_is_drawn_past_it():
+    button = label_button("Hello world")
+    label_width = button.label_font.size("Hello world")[0]
+    assert label_width > 50
+    # The label starts inside the outline and sticks out on the right
+    assert button.bounding_rect == pygame.Rect(7, 7, 3 + label_width, 56)
+    screen = pygame.Surface((200, 80))
+    button.draw(screen)
+    assert max(green_columns(screen)) > button.x + button.width
+
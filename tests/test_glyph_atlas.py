@@ -0,0 +1,46 @@
+import os
+
+import pygame
+import pytest
+
+from pygame_input import GlyphAtlas
+from pygame_input import glyph_atlas
+
+ARIAL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts", "ARIAL.TTF")
+YELLOW = (255, 200, 0)
+
+
+def arial_atlas(**kwargs):
+    pygame.font.init()
+    return GlyphAtlas(pygame.font.Font(ARIAL, 20), **kwargs)
+
+
+def drawn(atlas, text):
+    surface = pygame.Surface((300, 40))
+    rect = atlas.draw(surface, text, (5, 5), YELLOW)
+    return surface, rect
+
+
+@pytest.mark.skipif(not glyph_atlas._FBLITS, reason="the atlas is only drawn from with Surface.fblits")
+def test_string_is_laid_out_when_it_comes_back():
+    atlas = arial_atlas()
+    first, first_rect = drawn(atlas, "Ammo 17 / 30")
+    assert atlas._layouts["Ammo 17 / 30"] is None
+    again, again_rect = drawn(atlas, "Ammo 17 / 30")
+    assert atlas._layouts["Ammo 17 / 30"] is not None
+    # The font's and the atlas' text are placed alike
+    assert first_rect.width == again_rect.width
+    assert pygame.image.tobytes(first, "RGB") == pygame.image.tobytes(again, "RGB")
+
+
+def test_measuring_does_not_count_as_seen():
+    atlas = arial_atlas()
+    assert atlas.size("Score") == atlas.font.size("Score")
+    assert "Score" not in atlas._layouts
+
+
+def test_long_strings_are_left_to_the_font():
+    atlas = arial_atlas(max_length=8)
+    for _ in range(3):
+        drawn(atlas, "gg that was a close round")
+    assert not atlas._layouts
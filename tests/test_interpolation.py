@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from interpolation import InterpolationBuffer
+
+
+def entity(x, y=0.0, angle=0.0, **fields):
+    return {"x": x, "y": y, "angle": angle, **fields}
+
+
+def buffer_with(*snapshots, **kwargs):
+    buffer = InterpolationBuffer(delay=0.1, **kwargs)
+    for timestamp, entities in snapshots:
+        buffer.push(entities, timestamp)
+    return buffer
+
+
+def test_empty_buffer_samples_nothing():
+    assert InterpolationBuffer().sample(1.0) == {}
+
+
+def test_render_time_before_the_oldest_snapshot_holds_it():
+    buffer = buffer_with((1.0, {1: entity(0.0)}), (1.1, {1: entity(10.0)}))
+    assert buffer.sample(1.05) == {1: entity(0.0)}
+
+
+def test_render_time_between_snapshots_interpolates_the_bracketing_pair():
+    buffer = buffer_with((1.0, {1: entity(0.0)}), (1.1, {1: entity(10.0, 5.0)}), (1.2, {1: entity(30.0, 5.0)}))
+    assert buffer.sample(1.125)[1]["x"] == pytest.approx(2.5)
+    sampled = buffer.sample(1.25)[1]
+    assert sampled["x"] == pytest.approx(20.0)
+    assert sampled["y"] == pytest.approx(5.0)
+
+
+def test_extrapolation_past_the_newest_snapshot_is_capped():
+    buffer = buffer_with((1.0, {1: entity(0.0)}), (1.1, {1: entity(10.0)}), max_extrapolation=0.2)
+    assert buffer.sample(1.25)[1]["x"] == pytest.approx(15.0)
+    # Snapshots stopped arriving, entities stop max_extrapolation after the newest one
+    assert buffer.sample(1.4)[1]["x"] == pytest.approx(30.0)
+    assert buffer.sample(5.0)[1]["x"] == pytest.approx(30.0)
+
+
+def test_single_snapshot_is_not_extrapolated():
+    buffer = buffer_with((1.0, {1: entity(3.0)}))
+    assert buffer.sample(2.0) == {1: entity(3.0)}
+
+
+def test_older_snapshots_are_ignored():
+    buffer = buffer_with((1.0, {1: entity(0.0)}), (1.1, {1: entity(10.0)}), (1.05, {1: entity(99.0)}))
+    assert len(buffer) == 2
+    assert buffer.sample(1.15)[1]["x"] == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("start, end, alpha, expected", [
+    (3.1, -3.1, 0.5, math.pi),
+    (-3.1, 3.1, 0.5, -math.pi),
+    (3.0, -3.0, 0.25, 3.0 + (math.tau - 6.0) * 0.25),
+    (3.1, -3.1, 0.9, 3.1 + (math.tau - 6.2) * 0.9),
+    (0.5, -0.5, 0.5, 0.0),
+])
+def test_angles_blend_along_the_shortest_arc_and_stay_in_range(start, end, alpha, expected):
+    buffer = buffer_with((1.0, {1: entity(0.0, angle=start)}), (2.0, {1: entity(0.0, angle=end)}))
+    angle = buffer.sample(1.1 + alpha)[1]["angle"]
+    assert -math.pi <= angle <= math.pi
+    # pi and -pi are the same angle
+    assert math.cos(angle) == pytest.approx(math.cos(expected))
+    assert math.sin(angle) == pytest.approx(math.sin(expected), abs=1e-9)
+
+
+def test_entity_only_in_the_newer_snapshot_appears_as_it_is():
+    buffer = buffer_with((1.0, {1: entity(0.0)}), (1.1, {1: entity(10.0), 2: entity(50.0, health=80)}))
+    sampled = buffer.sample(1.15)
+    assert sampled[1]["x"] == pytest.approx(5.0)
+    assert sampled[2] == entity(50.0, health=80)
+    # Entities gone from the newer snapshot are not rendered
+    buffer.push({2: entity(60.0)}, 1.2)
+    assert set(buffer.sample(1.25)) == {2}
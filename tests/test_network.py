@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+from network import CONNECTION_ERROR, PONG, Network
+
+
+def test_lost_connection_is_reported_from_dispatch():
+    network = Network("ws://localhost:1")
+    threads = []
+    network.set_on_connection_error(lambda: threads.append(threading.current_thread()), do_default=False)
+    network.connected = True
+    network._on_connection_error()
+    assert not network.connected
+    assert not threads
+    network.dispatch()
+    assert threads == [threading.current_thread()]
+
+
+def test_giving_up_is_reported_from_dispatch():
+    network = Network("ws://localhost:1")
+    network.set_reconnect_policy(backoff_base=0, max_attempts=1)
+    calls = []
+    network.set_on_connection_error(lambda: calls.append(True))
+    assert not asyncio.run(network.connect())
+    assert not calls
+    assert [message["type"] for message in network.drain()] == [CONNECTION_ERROR]
+
+
+def test_pongs_to_pings_from_an_earlier_connection_are_ignored():
+    network = Network("ws://localhost:1")
+    # Not a dropped connection when the frames run out
+    network._closing = True
+    network._connected_at = 100.0
+    frames = [network.protocol.encode({"type": PONG, "t0": t0, "t1": t0, "t2": t0}) for t0 in (40.0, 100.5)]
+
+    async def websocket():
+        for frame in frames:
+            yield frame
+    asyncio.run(network._read(websocket()))
+    assert network.latency.sample_count == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from network import INPUT, PLAYER_STATE
+from prediction import PLAYER_SPEED, Predictor, move_player
+
+DT = 1 / 30
+
+
+def sent_seqs(network):
+    return [[command["seq"] for command in message["commands"]] for message in network.posted if message["type"] == INPUT]
+
+
+def test_apply_predicts_immediately(network):
+    predictor = Predictor(network)
+    predictor.apply(1, 0, 0.5, 0, DT)
+    assert predictor.state["x"] == pytest.approx(PLAYER_SPEED * DT)
+    assert predictor.state["angle"] == 0.5
+    # Diagonal input is not faster
+    state = move_player({"x": 0.0, "y": 0.0, "angle": 0.0}, {"dx": 1, "dy": 1, "angle": 0.0, "dt": 1.0})
+    assert (state["x"] ** 2 + state["y"] ** 2) ** 0.5 == pytest.approx(PLAYER_SPEED)
+
+
+def test_flush_sends_new_commands_with_redundant_unacknowledged_ones(network):
+    predictor = Predictor(network, redundancy=2)
+    assert not predictor.flush()
+    for _ in range(3):
+        predictor.apply(1, 0, 0.0, 0, DT)
+    assert predictor.flush()
+    predictor.apply(1, 0, 0.0, 0, DT)
+    predictor.flush()
+    assert sent_seqs(network) == [[1, 2, 3], [2, 3, 4]]
+
+
+def test_server_state_is_reconciled_by_replaying_pending_commands(network):
+    predictor = Predictor(network)
+    for dx in (1, 1, 0, -1, 1):
+        predictor.apply(dx, 1, 0.0, 0, DT)
+    predictor.flush()
+    corrections = []
+    predictor.set_on_correction(lambda predictor, predicted: corrections.append(predicted))
+
+    # The server processed the first two commands but placed the player 10 units further
+    network.receive(PLAYER_STATE, {"type": PLAYER_STATE, "seq": 2, "x": 10.0 + 2 * PLAYER_SPEED * DT,
+                                   "y": 0.0, "angle": 0.0})
+    assert [command["seq"] for command in predictor.pending] == [3, 4, 5]
+    expected = {"x": 10.0 + 2 * PLAYER_SPEED * DT, "y": 0.0, "angle": 0.0}
+    for command in predictor.pending:
+        expected = move_player(expected, command)
+    assert predictor.state == pytest.approx(expected)
+    assert len(corrections) == 1
+
+    # A state older than the last acknowledged one changes nothing
+    network.receive(PLAYER_STATE, {"type": PLAYER_STATE, "seq": 1, "x": 0.0, "y": 0.0, "angle": 0.0})
+    assert predictor.state == pytest.approx(expected)
+    assert predictor.acknowledged_seq == 2
+
+
+def test_matching_server_state_is_not_a_correction(network):
+    predictor = Predictor(network)
+    predictor.apply(1, 0, 0.0, 0, DT)
+    predictor.apply(1, 0, 0.0, 0, DT)
+    corrections = []
+    predictor.set_on_correction(lambda predictor, predicted: corrections.append(predicted))
+    network.receive(PLAYER_STATE, {"type": PLAYER_STATE, "seq": 1, "x": PLAYER_SPEED * DT, "y": 0.0, "angle": 0.0})
+    assert predictor.state["x"] == pytest.approx(2 * PLAYER_SPEED * DT)
+    assert not corrections
@@ -0,0 +1,76 @@
+import struct
+
+import pytest
+
+from network import (DeltaCodec, Protocol, StructCodec, default_protocol, INPUT, PING, PLAYER_STATE, PONG,
+                     SNAPSHOT, SNAPSHOT_ACK, SNAPSHOT_DELTA, SNAPSHOT_REQUEST)
+
+# Values exactly representable as float32, so they survive the "f" fields unchanged
+MESSAGES = [
+    {"type": SNAPSHOT, "tick": 7, "server_time": 12.25,
+     "entities": [{"id": 1, "x": 1.5, "y": -2.0, "angle": 0.25, "health": 100},
+                  {"id": 65535, "x": 0.0, "y": 3.75, "angle": -1.0, "health": -1}]},
+    {"type": SNAPSHOT, "tick": 8, "server_time": 0.0, "entities": []},
+    {"type": SNAPSHOT_DELTA, "tick": 9, "baseline": 7, "server_time": 12.5,
+     "entities": [{"id": 1, "x": 2.5}, {"id": 3, "x": 1.0, "y": 2.0, "angle": 0.5, "health": 50}, {"id": 4}],
+     "removed": [65535, 2]},
+    {"type": SNAPSHOT_ACK, "tick": 9},
+    {"type": SNAPSHOT_REQUEST},
+    {"type": INPUT, "commands": [{"seq": 1, "dx": -1, "dy": 1, "angle": 0.5, "buttons": 3, "dt": 0.03125},
+                                 {"seq": 2, "dx": 0, "dy": 0, "angle": 0.0, "buttons": 0, "dt": 0.03125}]},
+    {"type": PLAYER_STATE, "seq": 2, "x": 10.5, "y": -4.0, "angle": 1.5},
+    {"type": PING, "t0": 123.456},
+    {"type": PONG, "t0": 1.0, "t1": 2.5, "t2": 2.75},
+]
+
+
+@pytest.mark.parametrize("message", MESSAGES, ids=lambda message: message["type"])
+def test_binary_round_trip(message):
+    protocol = default_protocol()
+    frame = protocol.encode(message)
+    assert isinstance(frame, bytes)
+    assert protocol.decode(frame) == message
+
+
+def test_json_messages_stay_text():
+    protocol = default_protocol()
+    message = {"mode": "login", "username": "a", "password": "b"}
+    frame = protocol.encode(message)
+    assert isinstance(frame, str)
+    assert protocol.decode(frame) == message
+    assert protocol.decode("[1, 2]") is None
+
+
+def test_unknown_and_empty_binary_frames():
+    protocol = default_protocol()
+    assert protocol.decode(b"") is None
+    assert protocol.decode(bytes((200,)) + b"\x00" * 8) is None
+
+
+@pytest.mark.parametrize("message", [message for message in MESSAGES if message["type"] != SNAPSHOT_REQUEST],
+                         ids=lambda message: message["type"])
+def test_truncated_frames_raise(message):
+    protocol = default_protocol()
+    frame = protocol.encode(message)
+    for length in range(1, len(frame)):
+        with pytest.raises(struct.error):
+            protocol.decode(frame[:length])
+
+
+def test_register_rejects_conflicting_ids():
+    protocol = Protocol()
+    protocol.register(1, "a", StructCodec())
+    protocol.register(1, "a", StructCodec())
+    with pytest.raises(ValueError):
+        protocol.register(1, "b", StructCodec())
+    with pytest.raises(ValueError):
+        protocol.register(256, "c", StructCodec())
+
+
+def test_delta_codec_only_sends_present_fields():
+    codec = DeltaCodec()
+    full = codec.encode({"tick": 1, "baseline": 0, "server_time": 0.0, "removed": [],
+                         "entities": [{"id": 1, "x": 1.0, "y": 1.0, "angle": 1.0, "health": 1}]})
+    partial = codec.encode({"tick": 1, "baseline": 0, "server_time": 0.0, "removed": [],
+                            "entities": [{"id": 1, "x": 1.0}]})
+    assert len(full) - len(partial) == 4 + 4 + 2
@@ -0,0 +1,83 @@
+from network import LOGIN_RESULT, SNAPSHOT, SNAPSHOT_ACK, SNAPSHOT_DELTA, SNAPSHOT_REQUEST
+from snapshot import SnapshotReceiver
+
+
+def full(tick, *entities):
+    return {"type": SNAPSHOT, "tick": tick, "server_time": tick / 30, "entities": list(entities)}
+
+
+def delta(tick, baseline, entities=(), removed=()):
+    return {"type": SNAPSHOT_DELTA, "tick": tick, "baseline": baseline, "server_time": tick / 30,
+            "entities": list(entities), "removed": list(removed)}
+
+
+def acks(network):
+    return [message["tick"] for message in network.posted if message["type"] == SNAPSHOT_ACK]
+
+
+def requests(network):
+    return [message for message in network.posted if message["type"] == SNAPSHOT_REQUEST]
+
+
+def test_full_snapshot_is_applied_and_acknowledged(network):
+    receiver = SnapshotReceiver(network)
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 1.0}, {"id": 2, "x": 2.0}))
+    assert receiver.tick == 5
+    assert receiver.entities == {1: {"id": 1, "x": 1.0}, 2: {"id": 2, "x": 2.0}}
+    assert acks(network) == [5]
+
+
+def test_delta_merges_into_its_baseline(network):
+    receiver = SnapshotReceiver(network)
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 1.0, "y": 1.0}, {"id": 2, "x": 2.0}))
+    network.receive(SNAPSHOT_DELTA, delta(6, 5, [{"id": 1, "x": 3.0}, {"id": 3, "x": 4.0}], removed=[2]))
+    assert receiver.entities == {1: {"id": 1, "x": 3.0, "y": 1.0}, 3: {"id": 3, "x": 4.0}}
+    # A later delta may still be against an older acknowledged baseline
+    network.receive(SNAPSHOT_DELTA, delta(7, 5, [{"id": 2, "y": 5.0}]))
+    assert receiver.entities == {1: {"id": 1, "x": 1.0, "y": 1.0}, 2: {"id": 2, "x": 2.0, "y": 5.0}}
+    assert acks(network) == [5, 6, 7]
+
+
+def test_delta_against_a_missing_baseline_requests_one_full_snapshot(network):
+    receiver = SnapshotReceiver(network)
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 1.0}))
+    network.receive(SNAPSHOT_DELTA, delta(6, 4, [{"id": 1, "x": 2.0}]))
+    network.receive(SNAPSHOT_DELTA, delta(7, 3, [{"id": 1, "x": 2.0}]))
+    assert receiver.tick == 5
+    assert len(requests(network)) == 1
+    network.receive(SNAPSHOT, full(8, {"id": 1, "x": 9.0}))
+    assert receiver.tick == 8
+    network.receive(SNAPSHOT_DELTA, delta(9, 2))
+    assert len(requests(network)) == 2
+
+
+def test_old_snapshots_are_ignored(network):
+    receiver = SnapshotReceiver(network)
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 1.0}))
+    network.receive(SNAPSHOT_DELTA, delta(6, 5, [{"id": 1, "x": 2.0}]))
+    network.receive(SNAPSHOT, full(4, {"id": 1, "x": 0.0}))
+    network.receive(SNAPSHOT_DELTA, delta(6, 5, [{"id": 1, "x": 7.0}]))
+    assert receiver.tick == 6
+    assert receiver.entities[1]["x"] == 2.0
+
+
+def test_history_bounds_the_baselines(network):
+    receiver = SnapshotReceiver(network, history=2)
+    for tick in range(1, 4):
+        network.receive(SNAPSHOT, full(tick, {"id": 1, "x": float(tick)}))
+    network.receive(SNAPSHOT_DELTA, delta(4, 1))
+    assert receiver.tick == 3
+    assert len(requests(network)) == 1
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 5.0}))
+    network.receive(SNAPSHOT_DELTA, delta(6, 3, [{"id": 1, "x": 6.0}]))
+    assert receiver.entities[1]["x"] == 6.0
+
+
+def test_login_drops_baselines_and_requests_a_full_snapshot(network):
+    receiver = SnapshotReceiver(network)
+    network.receive(SNAPSHOT, full(5, {"id": 1, "x": 1.0}))
+    network.receive(LOGIN_RESULT, {"failed": False, "id": "abc"})
+    assert receiver.tick is None
+    assert len(requests(network)) == 1
+    network.receive(SNAPSHOT_DELTA, delta(6, 5))
+    assert receiver.tick is None
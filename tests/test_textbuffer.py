@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from pygame_input.textbuffer import TextBuffer
+
+ADVANCES = {"i": 3, "m": 12, "W": 14, " ": 4}
+KERNING = {("A", "V"): -2, ("V", "A"): -2, ("T", "o"): -1, ("W", "a"): -3}
+
+
+class StubFont:
+    '''Font with whole pixel advances and pair kerning, lays text out like `pygame.font.Font.size`'''
+
+    bold = False
+    italic = False
+
+    def size(self, text):
+        width = sum(ADVANCES.get(char, 8) for char in text)
+        width += sum(KERNING.get(pair, 0) for pair in zip(text, text[1:]))
+        return width, 16
+
+
+def expected_x(font, text, index):
+    '''Where the font places the character at `index`, kerning with the one before it included'''
+    if index == len(text):
+        return font.size(text)[0]
+    return font.size(text[:index + 1])[0] - font.size(text[index])[0]
+
+
+def check_layout(buffer, text):
+    font = buffer.font
+    assert buffer.text == text
+    assert buffer.width == font.size(text)[0]
+    positions = [expected_x(font, text, index) for index in range(len(text) + 1)]
+    assert [buffer.x_of(index) for index in range(len(text) + 1)] == positions
+    for x in range(-5, positions[-1] + 10):
+        last = max([index for index, position in enumerate(positions) if position <= x], default=0)
+        assert buffer.index_at(x) == last, (text, buffer.cursor, x)
+
+
+@pytest.mark.parametrize("cursor", [0, 3, 6, 11])
+def test_x_of_and_index_at_follow_kerning_wherever_the_gap_is(cursor):
+    text = "AVAVA Today"
+    buffer = TextBuffer(StubFont(), text)
+    buffer.move_to(cursor)
+    check_layout(buffer, text)
+
+
+def test_random_edits_match_a_plain_string():
+    rng = random.Random(3)
+    alphabet = "AVTWoaim "
+    buffer = TextBuffer(StubFont())
+    text, cursor = "", 0
+    for _ in range(400):
+        action = rng.random()
+        if action < 0.45:
+            chunk = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3)))
+            buffer.insert(chunk)
+            text, cursor = text[:cursor] + chunk + text[cursor:], cursor + len(chunk)
+        elif action < 0.6:
+            count = rng.randint(1, 3)
+            assert buffer.delete_before(count) == text[max(0, cursor - count):cursor]
+            text, cursor = text[:max(0, cursor - count)] + text[cursor:], max(0, cursor - count)
+        elif action < 0.7:
+            count = rng.randint(1, 3)
+            assert buffer.delete_after(count) == text[cursor:cursor + count]
+            text = text[:cursor] + text[cursor + count:]
+        else:
+            cursor = rng.randint(-2, len(text) + 2)
+            buffer.move_to(cursor)
+            cursor = max(0, min(cursor, len(text)))
+        assert buffer.cursor == cursor
+        start, end = rng.randint(-2, len(text) + 2), rng.randint(-2, len(text) + 2)
+        assert buffer.slice(start, end) == text[start:end]
+        if rng.random() < 0.1:
+            check_layout(buffer, text)
+    check_layout(buffer, text)
+
+
+def test_set_text_keeps_the_cursor_when_it_fits():
+    buffer = TextBuffer(StubFont(), "hello world")
+    buffer.move_to(5)
+    buffer.set_text("hello there")
+    assert buffer.cursor == 5
+    buffer.set_text("hi")
+    assert buffer.cursor == 2
+    check_layout(buffer, "hi")
+
+
+def test_version_counts_edits_only():
+    buffer = TextBuffer(StubFont(), "abc")
+    version = buffer.version
+    buffer.move_to(1)
+    buffer.delete_before(0)
+    buffer.insert("")
+    assert buffer.version == version
+    buffer.insert("x")
+    assert buffer.version > version
+    version = buffer.version
+    buffer.delete_after()
+    assert buffer.version > version
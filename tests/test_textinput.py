@@ -0,0 +1,46 @@
+import pygame
+import pytest
+
+from pygame_input import TextInput
+
+TEXT = "the_quick_brown_fox_jumps_over_the_lazy_dog_0123456789"
+
+
+def press(key, unicode=""):
+    return [pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0),
+            pygame.event.Event(pygame.KEYUP, key=key, unicode=unicode, mod=0)]
+
+
+@pytest.fixture
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 40)
+
+
+def typed(font, text, left=0):
+    text_input = TextInput(0, 0, 400, 50, font=font)
+    text_input.activate()
+    for char in text:
+        text_input.handle_events(press(ord(char), char), 0.001)
+    for _ in range(left):
+        text_input.handle_events(press(pygame.K_LEFT), 0.001)
+    return text_input
+
+
+def visible_end(text_input, font):
+    return text_input._text_x + font.size(text_input._visible_text)[0]
+
+
+def test_caret_follows_the_last_typed_character(font):
+    text_input = typed(font, TEXT)
+    assert text_input._position_shift > 0
+    assert text_input._pointer_x == visible_end(text_input, font)
+    # Scrolled just far enough for the caret to fit
+    assert text_input._pointer_x + font.get_height() // 10 == text_input.width - text_input.padding * 2
+
+
+@pytest.mark.parametrize("text, left", [(TEXT, 1), (TEXT, 7), (TEXT, 20), ("AVAWAY To", 3), ("AVAWAY To", 9)])
+def test_caret_is_where_the_font_places_it(font, text, left):
+    text_input = typed(font, text, left)
+    expected = visible_end(text_input, font) - font.size(text[len(text) - left:])[0]
+    assert abs(text_input._pointer_x - expected) <= 1